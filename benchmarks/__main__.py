@@ -0,0 +1,54 @@
+"""Headless benchmark suite.
+
+Generates synthetic shortcut databases at several scales and times
+loading, persistence, ShortcutManager construction, grouping, search and
+display_shortcuts against a stub Treeview. Run from the repository root:
+
+    python -m benchmarks                          # small, medium, large
+    python -m benchmarks --scales xlarge --repeat 3
+    python -m benchmarks --output baseline.json
+    python -m benchmarks --compare baseline.json  # exits 1 on regressions
+"""
+import argparse
+import json
+import sys
+
+from benchmarks.suite import DEFAULT_SCALES, SCALES, compare, print_report, run
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default=",".join(DEFAULT_SCALES),
+                        help=f"comma-separated scales from {', '.join(SCALES)}")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a saved results file")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="slowdown ratio above 1 that counts as a regression (default 0.2)")
+    args = parser.parse_args(argv)
+
+    scales = [scale.strip() for scale in args.scales.split(",") if scale.strip()]
+    unknown = [scale for scale in scales if scale not in SCALES]
+    if unknown:
+        parser.error(f"unknown scales: {', '.join(unknown)}")
+
+    report = run(scales, args.repeat)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Hotkey and detector events handed to the Tk thread through EventDispatcher.
+
+One thread holds the hotkey down, so after the first press the keyboard
+hook repeats it every KEY_REPEAT ms, while another fires focus changes
+as fast as a busy desktop might. Calling the toggle on every hook event
+would flip the overlay once per repeat; the dispatcher toggles once and
+reports the queue depth and the delay before each event ran.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_dispatch
+"""
+import threading
+import time
+
+from benchmarks.stubs import StubRoot
+from src.ui.dispatcher import EventDispatcher
+from src.utils.metrics import LatencyRecorder
+
+HOLD = 2.0  # Seconds the hotkey is held down
+REPEAT_DELAY = 0.5  # Seconds before the first key repeat
+KEY_REPEAT = 0.033  # Seconds between key repeats
+FOCUS_INTERVAL = 0.005  # Seconds between focus changes
+
+
+def hold_hotkey(on_hotkey):
+    """Press the hotkey and hold it, repeating like the keyboard hook does"""
+    presses = 1
+    on_hotkey()
+    time.sleep(REPEAT_DELAY)
+    end = time.perf_counter() + HOLD - REPEAT_DELAY
+    while time.perf_counter() < end:
+        on_hotkey()
+        presses += 1
+        time.sleep(KEY_REPEAT)
+    return presses
+
+
+def change_focus(on_focus_change):
+    """Switch the foreground app every FOCUS_INTERVAL until HOLD runs out"""
+    end = time.perf_counter() + HOLD
+    i = 0
+    while time.perf_counter() < end:
+        on_focus_change(f"app{i % 10:04d}.exe")
+        i += 1
+        time.sleep(FOCUS_INTERVAL)
+
+
+def main():
+    root = StubRoot()
+    recorder = LatencyRecorder(enabled=True)
+    dispatcher = EventDispatcher(root, recorder=recorder)
+    toggles = []
+    focus_changes = []
+
+    presses = []
+    threads = [
+        threading.Thread(target=lambda: presses.append(hold_hotkey(
+            dispatcher.wrap(lambda: toggles.append(time.perf_counter()), coalesce="toggle")))),
+        threading.Thread(target=change_focus, args=(dispatcher.wrap(focus_changes.append),)),
+    ]
+    dispatcher.start()
+    for thread in threads:
+        thread.start()
+    root.run(HOLD + 0.1)
+    for thread in threads:
+        thread.join()
+    dispatcher.stop()
+
+    stats = dispatcher.stats()
+    dispatch = recorder.summary()["dispatch"]
+    print(f"hotkey events from the hook   {presses[0]:>6}")
+    print(f"toggles run without coalescing{presses[0]:>6}")
+    print(f"toggles run by the dispatcher {len(toggles):>6}")
+    print(f"focus changes delivered       {len(focus_changes):>6}")
+    print(f"events coalesced              {stats['coalesced']:>6}")
+    print(f"max queue depth               {stats['max_depth']:>6}")
+    print(f"dispatch latency p50/p99/max  {dispatch['p50']:.1f} / {dispatch['p99']:.1f} / "
+          f"{dispatch['max']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Ranked fuzzy search across every app as the shortcuts database grows.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_fuzzy
+"""
+import time
+
+from benchmarks.synthetic import generate_db
+from src.shortcuts.fuzzy import FuzzyIndex
+from src.shortcuts.record import db_to_records
+
+# Typos, partial words, chords and words shared by most entries
+QUERIES = ["comand palete", "comand pal", "toggle sidebar", "brekpoint", "formating",
+           "ctrl+shift+p", "F5", "editing", "the current", "zzzz"]
+SCALES = [(10, 1000), (50, 1000), (100, 1000), (200, 1000)]
+REPEAT = 5
+# One frame at 60 Hz
+FRAME_BUDGET_MS = 16.7
+
+
+def best_of(func, repeat=REPEAT):
+    """Run func repeat times and return the fastest time in ms"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    print(f"{'apps':>6} {'per app':>8} {'total':>9} {'build ms':>9} "
+          f"{'avg query ms':>13} {'max query ms':>13}  slowest query")
+    for num_apps, per_app in SCALES:
+        shortcuts_db = db_to_records(generate_db(num_apps, per_app))
+
+        start = time.perf_counter()
+        index = FuzzyIndex(shortcuts_db)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        times = {query: best_of(lambda: index.search(query)) for query in QUERIES}
+        slowest = max(times, key=times.get)
+        over = " (over frame budget)" if times[slowest] > FRAME_BUDGET_MS else ""
+
+        print(f"{num_apps:>6} {per_app:>8} {num_apps * per_app:>9} {build_ms:>9.1f} "
+              f"{sum(times.values()) / len(times):>13.3f} {times[slowest]:>13.3f}  "
+              f"{slowest!r}{over}")
+
+
+if __name__ == "__main__":
+    main()
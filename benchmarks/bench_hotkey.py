@@ -0,0 +1,74 @@
+"""Hotkey-to-visible latency with and without the foreground detector.
+
+Without the detector every hotkey press resolves the foreground process
+before anything can be shown: the window's pid from the platform (two
+xprop runs on X11), then its name through get_process_name and psutil.
+With the detector, the process is already known from the last
+focus-change event and the hotkey path only reads it. The X11 row needs
+xprop and a display and is skipped without them.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_hotkey
+"""
+import os
+import shutil
+import time
+
+from benchmarks.synthetic import MemoryConfig, generate_db
+from src.shortcuts.detector import FakeBackend, ForegroundDetector, x11_active_pid
+from src.shortcuts.manager import ShortcutManager
+from src.utils.system import get_process_name
+
+PRESSES = 2000
+# Each X11 lookup starts two xprop processes, so it gets fewer presses
+X11_PRESSES = 100
+
+
+def time_presses(resolve, manager, presses=PRESSES):
+    """Time the hotkey path: resolve the process, then fetch its grouped view"""
+    times = []
+    for _ in range(presses):
+        start = time.perf_counter()
+        process_name = resolve()
+        manager.get_grouped_shortcuts(process_name)
+        times.append((time.perf_counter() - start) * 1e6)
+    times.sort()
+    return times[len(times) // 2], times[int(len(times) * 0.99)]
+
+
+def main():
+    shortcuts_db = generate_db(50, 200)
+    manager = ShortcutManager(MemoryConfig(shortcuts_db))
+
+    # Pretend our own process is in the foreground and is called app0000.exe;
+    # its name still goes through the shared psutil cache like a real press
+    def name_lookup_on_press():
+        get_process_name(os.getpid())
+        return "app0000.exe"
+
+    def x11_lookup_on_press():
+        pid = x11_active_pid()
+        if pid is not None:
+            get_process_name(pid)
+        return "app0000.exe"
+
+    fake_backend = FakeBackend()
+    detector = ForegroundDetector(fake_backend, ignore_pids=())
+    detector.start()
+    fake_backend.emit("app0000.exe", pid=os.getpid())
+
+    paths = [("lookup on press, name only", name_lookup_on_press, PRESSES)]
+    if shutil.which("xprop") and os.environ.get("DISPLAY"):
+        paths.append(("lookup on press, X11", x11_lookup_on_press, X11_PRESSES))
+    paths.append(("detector (event-driven)", detector.get_current_process, PRESSES))
+
+    print(f"{'path':<28} {'p50 us':>8} {'p99 us':>8}")
+    for label, resolve, presses in paths:
+        p50, p99 = time_presses(resolve, manager, presses)
+        print(f"{label:<28} {p50:>8.1f} {p99:>8.1f}")
+    if len(paths) == 2:
+        print(f"{'lookup on press, X11':<28} skipped (needs xprop and a display)")
+
+if __name__ == "__main__":
+    main()
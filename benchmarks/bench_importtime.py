@@ -0,0 +1,95 @@
+"""Cold start cost: module import time and time to the first usable window.
+
+Each measurement runs in a fresh interpreter, since a warm one has the
+modules cached already. Run from the repository root:
+
+    python -m benchmarks.bench_importtime
+"""
+import os
+import subprocess
+import sys
+import time
+
+ENTRY_POINTS = ("shortcut_helper", "src.app")
+REPEAT = 5
+TOP = 10
+
+# Builds the app up to its first drawn frame, then reports ready; the
+# loader, detector and tray threads aren't waited for
+READY_SCRIPT = """
+import os
+import shortcut_helper
+helper = shortcut_helper.ShortcutHelper()
+helper.root.update()
+print("READY", flush=True)
+helper.root.destroy()
+os._exit(0)
+"""
+
+
+def import_times(module):
+    """Import module in a fresh interpreter and get {module: cumulative us}"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue  # header line
+        times[fields[2].strip()] = int(fields[1])
+    return times
+
+
+def best_import_times(module, repeat=REPEAT):
+    """Get the fastest cumulative time of each module over repeat runs"""
+    best = {}
+    for _ in range(repeat):
+        for name, us in import_times(module).items():
+            best[name] = min(us, best.get(name, us))
+    return best
+
+
+def time_to_ready(repeat=REPEAT):
+    """Get the fastest time in ms until the main window has drawn.
+
+    Raises RuntimeError with the end of the app's error output if it
+    exits before drawing.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, "-c", READY_SCRIPT],
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        line = process.stdout.readline()
+        elapsed = (time.perf_counter() - start) * 1000
+        _, stderr = process.communicate()
+        if not line.startswith("READY") or process.returncode:
+            last_line = stderr.strip().splitlines()[-1:] or ["no error output"]
+            raise RuntimeError(f"exit status {process.returncode}: {last_line[0]}")
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    for module in ENTRY_POINTS:
+        times = best_import_times(module)
+        print(f"import {module:24} {times.get(module, 0) / 1000:8.1f} ms")
+        slowest = sorted((name for name in times if name != module), key=times.get, reverse=True)
+        for name in slowest[:TOP]:
+            print(f"  {name:30} {times[name] / 1000:8.1f} ms")
+
+    if not (os.environ.get("DISPLAY") or sys.platform == "win32"):
+        print("first usable window         skipped (needs a display)")
+        return 0
+    try:
+        ready = time_to_ready()
+    except RuntimeError as e:
+        print(f"first usable window         FAILED ({e})")
+        return 1
+    print(f"first usable window         {ready:8.1f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""Resident memory per shortcut: JSON dicts vs Shortcut records.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_memory
+"""
+import gc
+import json
+import os
+import tempfile
+import tracemalloc
+
+from benchmarks.synthetic import generate_db
+from src.shortcuts.columnar import ColumnarShortcutDB
+from src.shortcuts.pack import open_pack, source_signature, write_pack
+from src.shortcuts.record import db_to_records
+
+NUM_APPS = 200
+PER_APP = 2000
+
+
+def allocated_by(func):
+    """Return func's result and the bytes still allocated for it afterwards"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func()
+        gc.collect()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, size
+
+
+def main():
+    shortcuts_db = generate_db(NUM_APPS, PER_APP)
+    total = NUM_APPS * PER_APP
+    data = json.dumps(shortcuts_db, indent=2).encode("utf-8")
+    del shortcuts_db
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        json_path = os.path.join(tmp_dir, "shortcuts.json")
+        pack_path = os.path.join(tmp_dir, "shortcuts.pack")
+        with open(json_path, "wb") as f:
+            f.write(data)
+        write_pack(db_to_records(json.loads(data)), pack_path, os.stat(json_path), source_signature(data))
+
+        def load_pack():
+            with open_pack(pack_path, json_path) as pack:
+                return pack.to_dict()
+
+        def load_columnar():
+            with open_pack(pack_path, json_path) as pack:
+                return ColumnarShortcutDB.from_pack(pack)
+
+        print(f"{total} shortcuts in {NUM_APPS} apps")
+        print(f"{'layout':<28} {'MB':>8} {'bytes/shortcut':>15}")
+        for name, load in [
+            ("dicts (json.loads)", lambda: json.loads(data)),
+            ("records (json + pool)", lambda: db_to_records(json.loads(data))),
+            ("records (pack)", load_pack),
+            ("columnar (pack)", load_columnar),
+        ]:
+            result, size = allocated_by(load)
+            print(f"{name:<28} {size / 1e6:>8.1f} {size / total:>15.1f}")
+            del result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Per-keystroke search latency as an app's shortcut list grows.
+
+The index and the naive scan search the same app's list with the same
+matching rules, so the columns compare like for like. The growth column
+is the index's average keystroke time relative to the smallest app. It
+is not flat: the first keystroke returns nearly every entry, and
+sorting and listing those results grows with the app. The keystrokes
+after it are answered from prefix buckets and intersections and stay
+well under a millisecond. The naive scan grows linearly throughout.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_search
+"""
+import time
+
+from benchmarks.synthetic import generate_db
+from src.shortcuts.search import SEARCH_FIELDS, SearchIndex, tokenize
+
+QUERY = "toggle command palette"
+APP_SIZES = [500, 1000, 2000, 5000]
+
+
+def naive_search(shortcuts, query):
+    """Scan an app's entries for ones matching every query token as a prefix, for comparison"""
+    tokens = tokenize(query)
+    results = []
+    for shortcut in shortcuts:
+        entry_tokens = [t for field in SEARCH_FIELDS for t in tokenize(shortcut.get(field) or "")]
+        if all(any(t.startswith(token) for t in entry_tokens) for token in tokens):
+            results.append(shortcut)
+    return results
+
+
+def time_keystrokes(search, query):
+    """Type query one character at a time and return per-keystroke times in ms"""
+    times = []
+    for i in range(1, len(query) + 1):
+        start = time.perf_counter()
+        search(query[:i])
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main():
+    print(f"{'shortcuts':>9} {'index ms':>9} {'first key ms':>13} {'avg key ms':>11} {'max key ms':>11} "
+          f"{'growth':>7} {'naive avg ms':>13} {'naive max ms':>13} {'speedup':>8}")
+    base_avg = None
+    for size in APP_SIZES:
+        shortcuts = next(iter(generate_db(1, size).values()))
+
+        start = time.perf_counter()
+        index = SearchIndex(shortcuts)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        times = time_keystrokes(index.search, QUERY)
+        naive = time_keystrokes(lambda q: naive_search(shortcuts, q), QUERY)
+        avg, naive_avg = sum(times) / len(times), sum(naive) / len(naive)
+        base_avg = base_avg or avg
+
+        print(f"{size:>9} {build_ms:>9.1f} {times[0]:>13.3f} {avg:>11.3f} {max(times):>11.3f} "
+              f"{avg / base_avg:>6.1f}x {naive_avg:>13.3f} {max(naive):>13.3f} {naive_avg / avg:>7.0f}x")
+
+if __name__ == "__main__":
+    main()
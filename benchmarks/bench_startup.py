@@ -0,0 +1,89 @@
+"""Startup cost of loading the shortcuts DB: JSON parse vs compiled pack.
+
+Decoding the whole pack costs about as much as parsing the JSON, so the
+default eager startup (read_shortcuts_file, the tray app) gains little
+or nothing from the pack. The startup win comes from lazy_loading,
+which decodes only the app that is looked up; the last two rows time
+ShortcutManager in both modes up to the first grouped app.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_startup
+"""
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_db
+from src.shortcuts.manager import ShortcutManager
+from src.shortcuts.pack import open_pack, source_signature, write_pack
+from src.shortcuts.record import db_to_records
+from src.utils.config import ConfigManager
+
+NUM_APPS = 100
+PER_APP = 500
+REPEAT = 5
+
+
+def best_of(func, repeat=REPEAT):
+    """Run func repeat times and return the fastest time in ms"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    shortcuts_db = generate_db(NUM_APPS, PER_APP)
+    first_app = next(iter(shortcuts_db))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        json_path = os.path.join(tmp_dir, "shortcuts.json")
+        pack_path = os.path.join(tmp_dir, "shortcuts.pack")
+
+        data = json.dumps(shortcuts_db, indent=2).encode("utf-8")
+        with open(json_path, "wb") as f:
+            f.write(data)
+        write_pack(shortcuts_db, pack_path, os.stat(json_path), source_signature(data))
+
+        def load_json():
+            with open(json_path, "rb") as f:
+                return json.loads(f.read())
+
+        def load_pack():
+            with open_pack(pack_path, json_path) as pack:
+                return pack.to_dict()
+
+        def load_pack_one_app():
+            with open_pack(pack_path, json_path) as pack:
+                return pack.get_app(first_app)
+
+        assert load_pack() == db_to_records(load_json())
+
+        config = ConfigManager(os.path.join(tmp_dir, "config"))
+        config.save_shortcuts(shortcuts_db)
+        config.flush()
+
+        def first_app_shown(lazy):
+            ShortcutManager(config, lazy=lazy).get_grouped_shortcuts(first_app)
+
+        json_ms = best_of(load_json)
+        print(f"{NUM_APPS * PER_APP} shortcuts, JSON {os.path.getsize(json_path) / 1e6:.1f} MB, "
+              f"pack {os.path.getsize(pack_path) / 1e6:.1f} MB")
+        for name, func in [
+            ("json.load", load_json),
+            ("mmap pack, full decode (eager)", load_pack),
+            ("mmap pack, one app (lazy)", load_pack_one_app),
+            ("manager to first app, eager", lambda: first_app_shown(False)),
+            ("manager to first app, lazy", lambda: first_app_shown(True)),
+        ]:
+            elapsed = json_ms if func is load_json else best_of(func)
+            print(f"{name:<32} {elapsed:8.1f} ms  {elapsed / json_ms:5.2f}x json.load")
+        config.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Check that the bundled shortcut packs load and their keys parse as written.
+
+Every keys field of every bundled pack is parsed. A bare key after
+" / " must keep the modifiers of the chord before it, so "Alt+↑ / ↓"
+gives Alt+Down rather than a bare Down. A few known bindings are
+also looked up by chord. Exits 1 if any check fails.
+
+Run from the repository root:
+
+    python -m benchmarks.check_packs
+"""
+import sys
+
+from benchmarks.synthetic import MemoryConfig
+from src.shortcuts.chords import format_sequence, parse_keys
+from src.shortcuts.loader import DEFAULT_DATA_DIR, load_packs
+from src.shortcuts.manager import ShortcutManager
+
+# (app, keys to look up, description that must be bound to them)
+EXPECTED = [
+    ("Code.exe", "Alt+Down", "Move line up/down"),
+    ("Code.exe", "Ctrl+2", "Focus into editor group"),
+    ("Code.exe", "Ctrl+[", "Indent/outdent line"),
+    ("Code.exe", "Ctrl+Shift+P", "Show Command Palette"),
+    ("Code.exe", "F1", "Show Command Palette"),
+]
+# (app, keys to look up, description that must not be bound to them)
+UNEXPECTED = [
+    ("Code.exe", "Down", "Move line up/down"),
+    ("Code.exe", "2", "Focus into editor group"),
+]
+
+
+def check_inherited_modifiers(shortcuts_db):
+    """Find keys like "Ctrl+1 / 2" where a bare alternative lost its modifiers"""
+    problems = []
+    for app_name, shortcuts in shortcuts_db.items():
+        for shortcut in shortcuts:
+            keys = shortcut.get("keys", "")
+            alternatives = keys.split(" / ")
+            if len(alternatives) < 2 or "+" not in alternatives[0]:
+                continue
+            for sequence in parse_keys(keys):
+                if not sequence[-1].mods:
+                    problems.append(f"{app_name}: {keys!r} gives bare {format_sequence(sequence)}")
+    return problems
+
+
+def check_lookups(manager):
+    """Find the EXPECTED bindings that are missing and UNEXPECTED ones that are found"""
+    problems = []
+    for app_name, keys, description in EXPECTED + UNEXPECTED:
+        found = any(app == app_name and shortcut.get("description") == description
+                    for app, shortcut in manager.lookup_keys(keys))
+        if found != ((app_name, keys, description) in EXPECTED):
+            problems.append(f"{app_name}: {keys} {'is not' if not found else 'is'} bound to {description!r}")
+    return problems
+
+
+def main():
+    shortcuts_db, errors = load_packs([DEFAULT_DATA_DIR])
+    problems = [f"{error.path}: {error.message}" for error in errors]
+
+    unparsed = 0
+    for shortcuts in shortcuts_db.values():
+        for shortcut in shortcuts:
+            if not parse_keys(shortcut.get("keys", "")):
+                unparsed += 1
+    total = sum(len(shortcuts) for shortcuts in shortcuts_db.values())
+
+    problems += check_inherited_modifiers(shortcuts_db)
+    problems += check_lookups(ShortcutManager(MemoryConfig(shortcuts_db)))
+
+    print(f"{len(shortcuts_db)} apps, {total} shortcuts, {unparsed} keys fields that are not key presses")
+    for problem in problems:
+        print(f"FAIL {problem}")
+    if problems:
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
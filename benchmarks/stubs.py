@@ -0,0 +1,117 @@
+import itertools
+import time
+
+
+class StubTreeview:
+    """Headless stand-in for ttk.Treeview.
+
+    Implements the item operations the UI uses and counts calls, each of
+    which would be a Tcl round trip on a real Treeview.
+    """
+
+    def __init__(self):
+        self.children = {"": []}
+        self.parents = {}
+        self.data = {}
+        self.calls = 0
+        self._ids = itertools.count(1)
+
+    def insert(self, parent, index, text="", values=(), **options):
+        self.calls += 1
+        item = f"I{next(self._ids):05X}"
+        self.children[item] = []
+        self.data[item] = {"text": text, "values": values, **options}
+        self._attach(item, parent, index)
+        return item
+
+    def _attach(self, item, parent, index):
+        siblings = self.children[parent]
+        siblings.insert(len(siblings) if index == "end" else index, item)
+        self.parents[item] = parent
+
+    def _detach(self, item):
+        parent = self.parents.pop(item, None)
+        # The parent may already be gone when a subtree is being deleted
+        if parent in self.children:
+            self.children[parent].remove(item)
+
+    def get_children(self, item=""):
+        self.calls += 1
+        return tuple(self.children[item])
+
+    def set_children(self, item, *new_children):
+        self.calls += 1
+        for child in self.children[item]:
+            self.parents.pop(child, None)
+        self.children[item] = []
+        for child in new_children:
+            self._detach(child)
+            self._attach(child, item, "end")
+
+    def detach(self, *items):
+        self.calls += 1
+        for item in items:
+            self._detach(item)
+
+    def move(self, item, parent, index):
+        self.calls += 1
+        self._detach(item)
+        self._attach(item, parent, index)
+
+    def delete(self, *items):
+        self.calls += 1
+        stack = list(items)
+        while stack:
+            item = stack.pop()
+            if item not in self.data:
+                continue
+            stack.extend(self.children.pop(item))
+            self._detach(item)
+            del self.data[item]
+
+    def item(self, item, option=None, **options):
+        self.calls += 1
+        if options:
+            self.data[item].update(options)
+            return None
+        return self.data[item].get(option) if option else dict(self.data[item])
+
+    def focus(self, item=None):
+        self.calls += 1
+        if item is None:
+            return getattr(self, "_focus", "")
+        self._focus = item
+
+    def selection_set(self, *items):
+        self.calls += 1
+
+
+class StubRoot:
+    """Headless stand-in for the after() timers of a Tk root.
+
+    run() plays the part of mainloop on the calling thread, firing each
+    timer once it is due.
+    """
+
+    def __init__(self):
+        self.timers = {}  # timer id -> (due time, callback, args)
+        self._ids = itertools.count(1)
+
+    def after(self, ms, callback, *args):
+        timer_id = f"after#{next(self._ids)}"
+        self.timers[timer_id] = (time.perf_counter() + ms / 1000, callback, args)
+        return timer_id
+
+    def after_cancel(self, timer_id):
+        self.timers.pop(timer_id, None)
+
+    def run(self, seconds):
+        """Fire timers as they come due for the given number of seconds"""
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            now = time.perf_counter()
+            due = [timer_id for timer_id, (at, _, _) in self.timers.items() if at <= now]
+            for timer_id in due:
+                _, callback, args = self.timers.pop(timer_id)
+                callback(*args)
+            time.sleep(0.001)
@@ -0,0 +1,221 @@
+import json
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+
+from benchmarks.stubs import StubTreeview
+from benchmarks.synthetic import MemoryConfig, generate_db
+from src.shortcuts.fuzzy import FuzzyIndex
+from src.shortcuts.loader import (DEFAULT_DATA_DIR, MANIFEST_NAME, load_default_shortcuts,
+                                  load_packs, read_manifest)
+from src.shortcuts.manager import ShortcutManager, group_by_category
+from src.shortcuts.search import SearchIndex
+from src.utils.config import ConfigManager
+
+# name -> (number of apps, shortcuts per app)
+SCALES = {
+    "small": (10, 50),
+    "medium": (50, 500),
+    "large": (200, 2000),
+    "xlarge": (500, 5000),
+}
+DEFAULT_SCALES = ["small", "medium", "large"]
+
+SEARCH_QUERY = "toggle command palette"
+FUZZY_QUERIES = ["comand palete", "ctrl+shift+p", "brekpoint", "the current"]
+
+
+def measure(func, setup=None, repeat=5):
+    """Time func repeat times, calling setup (untimed) before each run"""
+    times = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        func(state) if setup else func()
+        times.append((time.perf_counter() - start) * 1000)
+    return {"min_ms": min(times), "median_ms": statistics.median(times), "runs": repeat}
+
+
+def run_scale(scale, repeat):
+    """Run every benchmark at one scale and return {benchmark: timings}"""
+    num_apps, per_app = SCALES[scale]
+    shortcuts_db = generate_db(num_apps, per_app)
+    first_app = next(iter(shortcuts_db))
+    results = {}
+
+    work_dir = tempfile.mkdtemp(prefix="shortcut-bench-")
+    try:
+        # load_default_shortcuts over the bundled packs' files and manifest,
+        # with per_app entries for every app the manifest maps to a pack
+        data_dir = os.path.join(work_dir, "default_shortcuts")
+        os.makedirs(data_dir)
+        shutil.copy(os.path.join(DEFAULT_DATA_DIR, MANIFEST_NAME), data_dir)
+        for file_name, app_names in read_manifest(DEFAULT_DATA_DIR, []).items():
+            with open(os.path.join(data_dir, file_name), "w") as f:
+                json.dump({app_name: shortcuts_db[first_app] for app_name in app_names}, f, indent=2)
+        results["load_default_shortcuts"] = measure(
+            lambda: load_default_shortcuts(data_dir), repeat=repeat)
+
+        # Pack discovery over a directory with one pack per app
+        packs_dir = os.path.join(work_dir, "packs")
+        os.makedirs(packs_dir)
+        for app_name, app_shortcuts in shortcuts_db.items():
+            with open(os.path.join(packs_dir, f"{app_name}.json"), "w") as f:
+                json.dump({app_name: app_shortcuts}, f, indent=2)
+        for executor, name in [("serial", "serial"), ("thread", "threads"),
+                               ("process", "processes"), ("auto", "auto")]:
+            results[f"load_packs_{name}"] = measure(
+                lambda: load_packs([packs_dir], executor=executor), repeat=repeat)
+
+        # ConfigManager persistence
+        config = ConfigManager(os.path.join(work_dir, "config"))
+        # Time on the calling thread, then the write itself
+        results["config_save_shortcuts"] = measure(
+            lambda: config.save_shortcuts(shortcuts_db), repeat=repeat)
+        results["config_save_shortcuts_flush"] = measure(
+            lambda: (config.save_shortcuts(shortcuts_db), config.flush()), repeat=repeat)
+        results["config_save_app_shortcuts_flush"] = measure(
+            lambda: (config.save_app_shortcuts(first_app, shortcuts_db[first_app]), config.flush()),
+            repeat=repeat)
+
+        def drop_pack():
+            if os.path.exists(config.shortcuts_pack):
+                os.remove(config.shortcuts_pack)
+
+        results["config_get_shortcuts_json"] = measure(
+            lambda _: config.get_shortcuts(), setup=drop_pack, repeat=repeat)
+        config.get_shortcuts()
+        results["config_get_shortcuts_pack"] = measure(
+            config.get_shortcuts, repeat=repeat)
+
+        # ShortcutManager construction from the compiled pack
+        results["manager_init"] = measure(
+            lambda: ShortcutManager(config, lazy=False), repeat=repeat)
+        results["manager_init_lazy"] = measure(
+            lambda: ShortcutManager(config, lazy=True), repeat=repeat)
+        results["manager_init_columnar"] = measure(
+            lambda: ShortcutManager(config, columnar=True), repeat=repeat)
+
+        # Grouping and search over the columns instead of record lists
+        columnar = ShortcutManager(config, columnar=True)
+        config.close()
+
+        def group_all_columnar():
+            columnar.grouped_views.clear()
+            for app_name in shortcuts_db:
+                columnar.get_grouped_shortcuts(app_name)
+
+        results["group_all_apps_columnar"] = measure(group_all_columnar, repeat=repeat)
+
+        def type_query_columnar():
+            for i in range(1, len(SEARCH_QUERY) + 1):
+                columnar.search(first_app, SEARCH_QUERY[:i])
+
+        results["search_type_query_columnar"] = measure(type_query_columnar, repeat=repeat)
+
+        # Grouping every app
+        results["group_all_apps"] = measure(
+            lambda: [group_by_category(s) for s in shortcuts_db.values()], repeat=repeat)
+
+        # Search: index build, then typing a query one key at a time
+        app_shortcuts = shortcuts_db[first_app]
+        results["search_index_build"] = measure(lambda: SearchIndex(app_shortcuts), repeat=repeat)
+
+        def type_query(index):
+            for i in range(1, len(SEARCH_QUERY) + 1):
+                index.search(SEARCH_QUERY[:i])
+
+        results["search_type_query"] = measure(
+            type_query, setup=lambda: SearchIndex(app_shortcuts), repeat=repeat)
+
+        # Ranked fuzzy search across every app
+        manager = ShortcutManager(MemoryConfig(shortcuts_db))
+        results["fuzzy_index_build"] = measure(
+            lambda: FuzzyIndex(manager.shortcuts_db), repeat=repeat)
+        results["fuzzy_search_all"] = measure(
+            lambda: [manager.search_all(query) for query in FUZZY_QUERIES], repeat=repeat)
+
+        results.update(run_display(shortcuts_db, repeat))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return results
+
+
+def run_display(shortcuts_db, repeat):
+    """Time MainWindow.display_shortcuts against a stub Treeview"""
+    from src.ui.main_window import MainWindow
+
+    manager = ShortcutManager(MemoryConfig(shortcuts_db))
+    apps = list(shortcuts_db)[:2]
+
+    def new_window():
+        window = MainWindow(None, manager, MemoryConfig(shortcuts_db))
+        window.tree = StubTreeview()
+        return window
+
+    def show_new_app(window):
+        window.display_shortcuts(apps[-1])
+
+    def cached_window():
+        window = new_window()
+        for app_name in apps:
+            window.display_shortcuts(app_name)
+        return window
+
+    def switch_back(window):
+        window.display_shortcuts(apps[0])
+
+    return {
+        "display_shortcuts_cold": measure(show_new_app, setup=new_window, repeat=repeat),
+        "display_shortcuts_cached": measure(switch_back, setup=cached_window, repeat=repeat),
+    }
+
+
+def run(scales, repeat):
+    """Run the suite and return the report dict"""
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "repeat": repeat,
+        "results": {},
+    }
+    for scale in scales:
+        num_apps, per_app = SCALES[scale]
+        print(f"Running {scale} ({num_apps} apps x {per_app} shortcuts)...", flush=True)
+        report["results"][scale] = run_scale(scale, repeat)
+    return report
+
+
+def print_report(report):
+    """Print the results as a table"""
+    print(f"{'scale':<8} {'benchmark':<32} {'min ms':>10} {'median ms':>10}")
+    for scale, results in report["results"].items():
+        for name, timing in results.items():
+            print(f"{scale:<8} {name:<32} {timing['min_ms']:>10.2f} {timing['median_ms']:>10.2f}")
+
+
+def compare(report, baseline, threshold):
+    """Print current vs baseline best times and return the regressed benchmarks"""
+    regressions = []
+    print(f"{'scale':<8} {'benchmark':<32} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for scale, results in report["results"].items():
+        for name, timing in results.items():
+            old = baseline.get("results", {}).get(scale, {}).get(name)
+            if old is None:
+                print(f"{scale:<8} {name:<32} {'-':>10} {timing['min_ms']:>10.2f} {'new':>7}")
+                continue
+
+            # Best-of-N is far less noisy than the median for short benchmarks
+            ratio = timing["min_ms"] / old["min_ms"] if old["min_ms"] else float("inf")
+            flag = ""
+            if ratio > 1 + threshold:
+                flag = "  REGRESSION"
+                regressions.append(f"{scale}/{name}")
+            print(f"{scale:<8} {name:<32} {old['min_ms']:>10.2f} "
+                  f"{timing['min_ms']:>10.2f} {ratio:>6.2f}x{flag}")
+    return regressions
@@ -0,0 +1,73 @@
+import random
+
+# Vocabulary used to build plausible looking shortcut entries
+VERBS = ["Open", "Close", "Save", "Find", "Replace", "Toggle", "Show", "Hide", "Go to",
+         "Select", "Delete", "Insert", "Move", "Copy", "Rename", "Split", "Focus", "Run",
+         "Reload", "Format", "Zoom", "Undo", "Redo", "Print", "Export", "Import"]
+OBJECTS = ["File", "Tab", "Window", "Line", "Selection", "Terminal", "Panel", "Sidebar",
+           "Command Palette", "Bookmark", "Folder", "Page", "Document", "Symbol", "Editor",
+           "Definition", "Reference", "History", "Breakpoint", "Comment", "Column", "Row"]
+CATEGORIES = ["General", "Editing", "Navigation", "Search", "Tabs", "View", "Window",
+              "File Management", "Coding", "Debugging", "Formatting", "Tools"]
+MODIFIERS = ["Ctrl", "Shift", "Alt", "Win"]
+KEYS = list("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789") + [
+    "F1", "F2", "F3", "F5", "F12", "Enter", "Tab", "Space", "Delete", "Home", "End",
+    "Up", "Down", "Left", "Right", "/", "\\", "`", "-"]
+
+
+def random_keys(rng):
+    """Build a random key string in the free-text style of the data files"""
+    def chord():
+        mods = rng.sample(MODIFIERS, rng.choice([0, 1, 1, 2, 2, 3]))
+        return "+".join(mods + [rng.choice(KEYS)])
+
+    roll = rng.random()
+    if roll < 0.1:
+        return f"{chord()} {rng.choice(KEYS)}"
+    if roll < 0.2:
+        return f"{chord()} / {chord()}"
+    return chord()
+
+
+def generate_shortcuts(count, rng):
+    """Generate a list of synthetic shortcut entries"""
+    shortcuts = []
+    for _ in range(count):
+        verb = rng.choice(VERBS)
+        obj = rng.choice(OBJECTS)
+        shortcuts.append({
+            "description": f"{verb} {obj}",
+            "keys": random_keys(rng),
+            "category": rng.choice(CATEGORIES),
+            "detail": f"{verb} the current {obj.lower()} in the active {rng.choice(OBJECTS).lower()}"
+        })
+    return shortcuts
+
+
+def generate_db(num_apps, per_app, seed=0):
+    """Generate a synthetic shortcuts database with num_apps x per_app entries"""
+    rng = random.Random(seed)
+    return {f"app{i:04d}.exe": generate_shortcuts(per_app, rng) for i in range(num_apps)}
+
+
+class MemoryConfig:
+    """Stand-in for ConfigManager that keeps everything in memory"""
+
+    def __init__(self, shortcuts_db, **settings):
+        self.shortcuts_db = shortcuts_db
+        self.config = settings
+
+    def get(self, key, default=None):
+        return self.config.get(key, default)
+
+    def get_shortcuts(self):
+        return self.shortcuts_db
+
+    def save_shortcuts(self, shortcuts):
+        self.shortcuts_db = shortcuts
+
+    def save_app_shortcuts(self, app_name, shortcuts):
+        if shortcuts is None:
+            self.shortcuts_db.pop(app_name, None)
+        else:
+            self.shortcuts_db[app_name] = shortcuts
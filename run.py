@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 from src.main import main
 
-print("Starting application...")
-
 if __name__ == "__main__":
+    # Guarded so pack-parsing worker processes, which re-import this
+    # script, don't print it too
+    print("Starting application...")
     main()
@@ -1,13 +1,21 @@
 import sys
-import json
 import os
-from pathlib import Path
-import psutil
-import keyboard
-import ctypes
-from ctypes import wintypes
-import win32gui
-import win32process
+import threading
+import time
+# keyboard, win32gui, win32process, pystray and PIL are imported where they
+# are first used, so they don't delay the first window
+from src.shortcuts.detector import ForegroundDetector, create_backend
+from src.shortcuts.fuzzy import FuzzyIndex
+from src.shortcuts.manager import diff_shortcuts, group_by_category
+from src.shortcuts.watcher import FileWatcher, create_backend as create_watcher_backend
+from src.shortcuts.search import SearchIndex
+from src.ui.background import BackgroundLoader, BackgroundSearch
+from src.ui.dispatcher import EventDispatcher
+from src.ui.virtual_rows import VirtualRows
+from src.utils.config import ConfigManager, apply_shortcut_changes
+from src.utils.log import configure_logging, get_logger
+from src.utils.metrics import latency
+from src.utils.system import get_process_name
 
 try:
     import tkinter as tk
@@ -16,12 +24,15 @@ except ImportError:
     print("Tkinter not found. Please install it.")
     sys.exit(1)
 
+log = get_logger("shortcut_helper")
+
 # Constants
 SHORTCUT_TRIGGER = 'ctrl+shift+space'  # Hotkey to toggle the overlay
 FADE_STEP = 0.05  # How much to decrease opacity each step
 FADE_DELAY = 50  # Milliseconds between each fade step
 # No auto-fade timer anymore
-CONFIG_FILENAME = 'shortcuts.json'
+VIRTUAL_THRESHOLD = 200  # Search results above this count are rendered windowed
+PRERENDER_DELAY = 150  # Milliseconds focus must rest on an app before it is pre-rendered
 
 class ShortcutHelper:
     def __init__(self):
@@ -68,14 +79,46 @@ class ShortcutHelper:
         # Initialize UI elements
         self.create_ui()
         
-        # Load shortcut database
-        self.shortcuts_db = self.load_shortcuts()
+        # Load the shortcut database in the background; the window and hotkey
+        # work meanwhile and lookups wait for it
+        self.config = ConfigManager()
+        # Per-stage hotkey timings are opt-in
+        if self.config.get("instrumentation"):
+            latency.enabled = True
+        self.shortcuts_db = {}
+        self.loader = BackgroundLoader(self.root, self.load_shortcuts, name="ShortcutLoader")
+        self.search_indexes = {}  # Per-app search indexes, built on first search
+        self.fuzzy_index = None  # Typo-tolerant index over every app, built when a search finds nothing
+        self.searcher = BackgroundSearch(self.root, name="ShortcutSearch")
+        self.grouped_views = {}  # Per-app category groups, built on first display
+        self.current_app = None
+        
+        # Hotkey, tray, detector and watcher callbacks come in on their own
+        # threads; they reach Tk through this queue
+        self.dispatcher = EventDispatcher(self.root, name="Events")
+        self.dispatcher.start()
+        
+        # Track the foreground app so the hotkey doesn't have to look it up
+        self.detector = None
+        self.focus_generation = 0  # Bumped on every focus change to cancel stale pre-renders
+        self.rendered_app = None  # App whose full shortcut list the tree shows
+        backend = create_backend()
+        if backend is not None:
+            self.detector = ForegroundDetector(backend)
+            self.detector.add_listener(self.dispatcher.wrap(self.on_focus_change))
+            self.detector.start()
+        
+        self.watcher = None
+        self.loader.when_ready(self.on_shortcuts_loaded)
+        self.loader.start()
         
         # Register global hotkey
-        keyboard.add_hotkey(SHORTCUT_TRIGGER, self.show_overlay)
+        import keyboard
+        keyboard.add_hotkey(SHORTCUT_TRIGGER, self.dispatcher.wrap(self.show_overlay, coalesce="toggle"))
         
-        # Create system tray icon
-        self.create_tray_icon()
+        # Create the system tray icon off the startup path
+        self.icon = None
+        threading.Thread(target=self.create_tray_icon, name="TrayIcon", daemon=True).start()
         
     def create_ui(self):
         """Create the UI elements for the overlay"""
@@ -121,6 +164,10 @@ class ShortcutHelper:
         self.root.bind("<Control-f>", lambda e: self.search_entry.focus_set())
         
 
+        # Title area under the search bar
+        title_frame = tk.Frame(main_frame, bg=self.colors['bg'])
+        title_frame.pack(fill=tk.X, pady=(0, 10))
+        
         # App name subtitle (will be updated dynamically)
         self.app_name_label = tk.Label(
             title_frame, 
@@ -134,6 +181,7 @@ class ShortcutHelper:
         # Create frame for shortcuts with tabs
         notebook = ttk.Notebook(main_frame)
         notebook.pack(fill=tk.BOTH, expand=True)
+        self.notebook = notebook
         
         # Create the shortcuts tab
         self.shortcuts_frame = ttk.Frame(notebook)
@@ -172,17 +220,22 @@ class ShortcutHelper:
         yscrollbar = ttk.Scrollbar(self.shortcuts_frame, orient="vertical", command=self.tree.yview)
         self.tree.configure(yscrollcommand=yscrollbar.set)
         
+        # Windowed rendering for long flat result lists
+        self.virtual_rows = VirtualRows(self.tree, yscrollbar)
+        
+        # Categories are filled in when first opened
+        self.pending_categories = {}
+        self.tree.bind("<<TreeviewOpen>>", lambda e: self.populate_category(self.tree.focus()))
+        
         # Pack Treeview and scrollbar
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         yscrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
         # Add keyboard navigation for the tree
-        self.tree.bind("<Up>", lambda e: self.tree.focus(self.tree.prev(self.tree.focus())) 
-                      if self.tree.prev(self.tree.focus()) else None)
-        self.tree.bind("<Down>", lambda e: self.tree.focus(self.tree.next(self.tree.focus())) 
-                        if self.tree.next(self.tree.focus()) else None)
+        self.tree.bind("<Up>", lambda e: self.move_focus(-1))
+        self.tree.bind("<Down>", lambda e: self.move_focus(1))
         self.tree.bind("<Left>", lambda e: self.tree.item(self.tree.focus(), open=False))
-        self.tree.bind("<Right>", lambda e: self.tree.item(self.tree.focus(), open=True))
+        self.tree.bind("<Right>", lambda e: self.expand_category(self.tree.focus()))
         
         # Configure style for dark theme
         style = ttk.Style()
@@ -267,19 +320,27 @@ This tool will help you become more productive by reducing dependency on the mou
             relief=[('pressed', 'sunken')]
         )
     
+    def on_shortcuts_loaded(self, shortcuts_db):
+        """Start using the shortcut database once the loader delivers it"""
+        self.shortcuts_db = shortcuts_db
+        
+        # Reload the shortcut file when it is edited while we run
+        self.watcher = FileWatcher(create_watcher_backend(),
+                                   [self.config.shortcuts_file, self.config.shortcuts_journal])
+        self.watcher.add_listener(self.on_files_changed)
+        self.watcher.start()
+    
     def load_shortcuts(self):
-        """Load shortcuts from JSON file or create default database if not exists"""
-        # Determine config directory
-        config_dir = os.path.join(os.path.expanduser("~"), ".shortcut_helper")
-        
-        # Create directory if it doesn't exist
-        if not os.path.exists(config_dir):
-            os.makedirs(config_dir)
+        """Load shortcuts from JSON file or create default database if not exists.
         
-        config_path = os.path.join(config_dir, CONFIG_FILENAME)
+        Runs on the loader's thread.
+        """
+        shortcuts = self.config.get_shortcuts()
+        if shortcuts is not None:
+            return shortcuts
         
         # If config file doesn't exist, create default
-        if not os.path.exists(config_path):
+        if not os.path.exists(self.config.shortcuts_file):
                             # Default shortcuts
             default_shortcuts = {
                 # VSCode shortcuts
@@ -387,40 +448,52 @@ This tool will help you become more productive by reducing dependency on the mou
             }
             
             # Write default shortcuts to file
-            with open(config_path, 'w') as f:
-                json.dump(default_shortcuts, f, indent=2)
+            self.config.save_shortcuts(default_shortcuts)
             
             return default_shortcuts
         
-        # Load existing shortcuts
-        try:
-            with open(config_path, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
-            print(f"Error loading shortcuts from {config_path}")
-            return {}
+        # The file exists but could not be read
+        log.error("Error loading shortcuts from %s", self.config.shortcuts_file)
+        return {}
     
     def get_active_window_process(self):
         """Get the process name of the currently active window"""
         try:
+            import win32gui
+            import win32process
+            
             # Get handle of active window
             hwnd = win32gui.GetForegroundWindow()
             
             # Get process ID from window handle
             _, process_id = win32process.GetWindowThreadProcessId(hwnd)
             
-            # Get process name from process ID
-            process = psutil.Process(process_id)
-            return process.name()
+            # Get process name from process ID (cached, PID-reuse safe)
+            return get_process_name(process_id)
         except Exception as e:
-            print(f"Error getting active window process: {e}")
+            log.warning("Error getting active window process: %s", e)
             return None
     
+    def get_current_process(self):
+        """Get the foreground process, from the detector when it knows it"""
+        if self.detector is not None:
+            process_name = self.detector.get_current_process()
+            if process_name:
+                return process_name
+        return self.get_active_window_process()
+    
     def display_shortcuts(self, process_name):
         """Display shortcuts for the active application"""
+        if not self.loader.ready:
+            self.show_loading(process_name)
+            return
+        
+        self.current_app = process_name
+        self.rendered_app = process_name
+        self.searcher.cancel()
+        
         # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self.clear_tree()
         
         # Update app name in the UI
         friendly_name = process_name.replace(".exe", "").capitalize()
@@ -428,35 +501,26 @@ This tool will help you become more productive by reducing dependency on the mou
         
         # Check if we have shortcuts for this process
         if process_name in self.shortcuts_db:
-            shortcuts = self.shortcuts_db[process_name]
+            # Group shortcuts by category, once per app
+            categories = self.grouped_views.get(process_name)
+            if categories is None:
+                with latency.span("grouping"):
+                    categories = group_by_category(self.shortcuts_db[process_name])
+                self.grouped_views[process_name] = categories
             
-            # Group shortcuts by category
-            categories = {}
-            for shortcut in shortcuts:
-                category = shortcut.get("category", "General")
-                if category not in categories:
-                    categories[category] = []
-                categories[category].append(shortcut)
-            
-            # Add categories and shortcuts to the tree
-            for category, shortcuts in categories.items():
-                # Add category as parent
-                category_id = self.tree.insert("", "end", text=category, values=("", ""))
-                
-                # Add shortcuts under the category
-                for shortcut in shortcuts:
-                    # Get description or empty string if not available
-                    description = shortcut.get("detail", "")
-                    
-                    self.tree.insert(
-                        category_id, 
+            # Add categories collapsed, their shortcuts are inserted on first open
+            with latency.span("tree_population"):
+                for category in categories:
+                    category_id = self.tree.insert(
+                        "", 
                         "end", 
-                        text=shortcut["description"], 
-                        values=(shortcut["keys"], description)
+                        text=f"{category.name} ({category.count})", 
+                        values=("", "")
                     )
-                
-                # Expand the category
-                self.tree.item(category_id, open=True)
+                    
+                    # Placeholder child so the category shows an expand indicator
+                    self.tree.insert(category_id, "end", text="", values=("", ""))
+                    self.pending_categories[category_id] = category
                 
             # Set focus to the first item for keyboard navigation
             if self.tree.get_children():
@@ -470,6 +534,146 @@ This tool will help you become more productive by reducing dependency on the mou
             self.tree.focus(no_shortcuts_id)
             self.tree.selection_set(no_shortcuts_id)
     
+    def show_loading(self, process_name):
+        """Show a placeholder for an app and queue its lookup until the shortcuts are loaded"""
+        self.current_app = process_name
+        self.rendered_app = None
+        self.clear_tree()
+        friendly_name = process_name.replace(".exe", "").capitalize()
+        self.app_name_label.config(text=f"Current Application: {friendly_name}")
+        self.tree.insert("", "end", text="Loading shortcuts...", values=("", ""))
+        self.loader.when_ready(lambda shortcuts_db: self.serve_lookup(process_name))
+    
+    def serve_lookup(self, process_name):
+        """Show an app queued while loading, unless the user has moved on since"""
+        if process_name != self.current_app or process_name == self.rendered_app:
+            return
+        if self.search_var.get().strip():
+            self.filter_shortcuts()
+        else:
+            self.display_shortcuts(process_name)
+    
+    def filter_shortcuts(self, *args):
+        """Filter the shortcuts of the current application by the search text"""
+        if not self.current_app or not self.loader.ready:
+            return
+        
+        query = self.search_var.get().strip()
+        if not query:
+            self.display_shortcuts(self.current_app)
+            return
+        
+        # Search off the Tk thread once typing pauses, so typing never waits on it
+        app_name = self.current_app
+        shortcuts_db = self.shortcuts_db
+        shortcuts = shortcuts_db.get(app_name, [])
+        index = self.search_indexes.get(app_name)
+        fuzzy_index = self.fuzzy_index
+        
+        def search():
+            # Build the index for this app once, later keystrokes reuse it
+            app_index = index if index is not None else SearchIndex(shortcuts)
+            results = app_index.search(query)
+            if results:
+                return app_index, fuzzy_index, results, []
+            
+            # Nothing starts with the query: allow typos in this app, then
+            # look through every app. Chord queries like "ctrl+t" rank key
+            # matches first, and each entry comes back once per search.
+            all_index = fuzzy_index if fuzzy_index is not None else FuzzyIndex(shortcuts_db)
+            matches = (all_index.search(query, app_name=app_name)
+                       or all_index.search(query))
+            return app_index, all_index, results, matches
+        
+        self.searcher.submit(
+            search,
+            lambda result: self.show_search_results(app_name, shortcuts_db, query, *result))
+    
+    def show_search_results(self, app_name, shortcuts_db, query, index, fuzzy_index, results, matches):
+        """Show the results of the newest search as a flat list.
+        
+        Prefix matches in the current app come first; failing those, fuzzy
+        matches are shown, labelled with their app when it is another one.
+        """
+        if app_name != self.current_app:
+            return
+        # Keep the indexes unless the shortcuts were reloaded while they were being built
+        if shortcuts_db is self.shortcuts_db:
+            self.search_indexes.setdefault(app_name, index)
+            if fuzzy_index is not None:
+                self.fuzzy_index = fuzzy_index
+        
+        rows = [
+            (shortcut["description"], (shortcut["keys"], shortcut.get("detail", "")))
+            for shortcut in results
+        ]
+        for match in matches:
+            shortcut = match.shortcut
+            text = shortcut["description"]
+            if match.app != app_name:
+                text = f"{text} ({match.app.replace('.exe', '').capitalize()})"
+            rows.append((text, (shortcut["keys"], shortcut.get("detail", ""))))
+        
+        # Show matches as a flat list
+        self.clear_tree()
+        self.rendered_app = None
+        
+        if len(rows) > VIRTUAL_THRESHOLD:
+            self.virtual_rows.show(rows)
+            return
+        
+        for text, values in rows:
+            self.tree.insert("", "end", text=text, values=values)
+        
+        if not rows:
+            self.tree.insert("", "end", text=f"No shortcuts matching \"{query}\"", values=("", ""))
+    
+    def clear_tree(self):
+        """Remove all items from the shortcuts tree"""
+        self.virtual_rows.clear()
+        self.pending_categories.clear()
+        self.tree.delete(*self.tree.get_children())
+    
+    def populate_category(self, category_id):
+        """Insert the shortcuts of a category the first time it is opened"""
+        category = self.pending_categories.pop(category_id, None)
+        if category is None:
+            return
+        
+        # Replace the placeholder with the real rows
+        self.tree.delete(*self.tree.get_children(category_id))
+        for shortcut in category.shortcuts:
+            self.tree.insert(
+                category_id, 
+                "end", 
+                text=shortcut["description"], 
+                values=(shortcut["keys"], shortcut.get("detail", ""))
+            )
+    
+    def expand_category(self, item):
+        """Open a category from the keyboard, filling it in first if needed"""
+        self.populate_category(item)
+        self.tree.item(item, open=True)
+    
+    def move_focus(self, delta):
+        """Move the keyboard focus up or down the tree"""
+        if self.virtual_rows.active:
+            self.virtual_rows.move_focus(delta)
+            return "break"
+        
+        current = self.tree.focus()
+        target = self.tree.prev(current) if delta < 0 else self.tree.next(current)
+        if target:
+            self.tree.focus(target)
+    
+    def clear_search(self):
+        """Clear the search text and show all shortcuts again"""
+        self.search_var.set("")
+    
+    def show_help(self):
+        """Switch to the help tab"""
+        self.notebook.select(self.help_frame)
+    
     def show_overlay(self):
         """Toggle the shortcut overlay for the current application"""
         # If already visible, hide it
@@ -477,17 +681,62 @@ This tool will help you become more productive by reducing dependency on the mou
             self.hide_overlay()
             return
             
-        # Get the active window process
-        process_name = self.get_active_window_process()
-        
-        # Update shortcuts display
-        if process_name:
-            self.display_shortcuts(process_name)
-        
-        # Show the window
-        self.root.deiconify()
-        self.root.attributes('-alpha', 0.9)
-        self.root.lift()
+        with latency.span("hotkey_to_visible"):
+            # Get the active window process
+            with latency.span("get_active_window_process"):
+                process_name = self.get_current_process()
+            
+            # Update shortcuts display, unless it was pre-rendered while hidden
+            if process_name and process_name != self.rendered_app:
+                self.display_shortcuts(process_name)
+            
+            # Show the window
+            with latency.span("show_window"):
+                self.root.deiconify()
+                self.root.attributes('-alpha', 0.9)
+                self.root.lift()
+    
+    def on_focus_change(self, process_name):
+        """Detector listener: schedule a pre-render of the newly focused app"""
+        self.focus_generation += 1
+        generation = self.focus_generation
+        self.root.after(PRERENDER_DELAY, lambda: self.prerender(process_name, generation))
+    
+    def prerender(self, process_name, generation):
+        """Build the overlay for an app while the window is hidden"""
+        # Focus moved on again before the delay ran out
+        if generation != self.focus_generation:
+            return
+        if self.root.state() == 'normal' or process_name == self.rendered_app:
+            return
+        self.display_shortcuts(process_name)
+    
+    def on_files_changed(self, paths):
+        """Watcher listener: reread the shortcut file, then swap changed apps in on the Tk thread"""
+        if all(self.config.is_own_write(path) for path in paths):
+            return
+        shortcuts = self.config.get_shortcuts(quarantine=False)
+        if shortcuts is None:
+            return
+        changes = diff_shortcuts(dict(self.shortcuts_db), shortcuts)
+        if changes:
+            log.info("Reloading shortcuts for %s", ", ".join(sorted(changes)))
+            self.dispatcher.post(self.apply_reload, changes)
+    
+    def apply_reload(self, changes):
+        """Swap in reloaded apps and redraw the tree if it shows one of them"""
+        # Publish a new dict rather than editing the one other threads may be reading
+        shortcuts_db = dict(self.shortcuts_db)
+        apply_shortcut_changes(shortcuts_db, changes)
+        self.shortcuts_db = shortcuts_db
+        self.fuzzy_index = None
+        for app_name in changes:
+            self.search_indexes.pop(app_name, None)
+            self.grouped_views.pop(app_name, None)
+        if self.rendered_app in changes:
+            self.display_shortcuts(self.rendered_app)
+        elif self.rendered_app is None and self.current_app in changes:
+            self.filter_shortcuts()
     
     # Fade functions removed since we're using toggle functionality
     
@@ -496,7 +745,11 @@ This tool will help you become more productive by reducing dependency on the mou
         self.root.withdraw()
     
     def create_tray_icon(self):
-        """Create a system tray icon (Windows only)"""
+        """Create and run the system tray icon (Windows only).
+
+        Runs on its own thread, since importing pystray and PIL and drawing
+        the icon would otherwise hold up the first window.
+        """
         try:
             import pystray
             from PIL import Image, ImageDraw
@@ -509,34 +762,56 @@ This tool will help you become more productive by reducing dependency on the mou
             # Draw 'K' for keyboard
             d.text((20, 10), "K", fill=(255, 255, 255))
             
-            # Create a menu
+            # Create a menu; its actions run on this thread and are posted to Tk
+            post = self.dispatcher.wrap
             menu = pystray.Menu(
-                pystray.MenuItem("Show Shortcuts", self.show_overlay),
-                pystray.MenuItem("Exit", self.exit_app)
+                pystray.MenuItem("Show Shortcuts", post(self.show_overlay, coalesce="toggle")),
+                pystray.MenuItem("Latency Stats", post(self.show_latency_stats)),
+                pystray.MenuItem("Dump Latency Stats", post(self.dump_latency_stats)),
+                pystray.MenuItem("Exit", post(self.exit_app))
             )
             
-            # Create the tray icon
+            # Create the tray icon and run it on this thread
             self.icon = pystray.Icon("ShortcutHelper", icon_image, "Shortcut Helper", menu)
-            
-            # Run the icon in a separate thread
-            import threading
-            self.icon_thread = threading.Thread(target=self.icon.run)
-            self.icon_thread.daemon = True
-            self.icon_thread.start()
+            self.icon.run()
             
         except ImportError:
-            print("pystray or PIL not found. System tray icon will not be available.")
+            log.warning("pystray or PIL not found. System tray icon will not be available.")
+    
+    def show_latency_stats(self):
+        """Show the hotkey latency percentiles and the event queue stats"""
+        from tkinter import messagebox
+        message = f"{latency.format_summary()}\n\n{self.dispatcher.format_stats()}"
+        messagebox.showinfo("Latency Stats", message, parent=self.root)
+    
+    def dump_latency_stats(self):
+        """Write the hotkey latency stats to a JSON file in the config directory"""
+        from tkinter import messagebox
+        config_dir = os.path.join(os.path.expanduser("~"), ".shortcut_helper")
+        path = os.path.join(config_dir, f"latency-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        try:
+            latency.dump(path)
+            messagebox.showinfo("Latency Stats", f"Saved to {path}", parent=self.root)
+        except OSError as e:
+            messagebox.showerror("Latency Stats", f"Could not save stats: {e}", parent=self.root)
     
     def exit_app(self):
         """Exit the application cleanly"""
-        if hasattr(self, 'icon'):
+        if self.icon is not None:
             self.icon.stop()
+        if self.detector is not None:
+            self.detector.stop()
+        if self.watcher is not None:
+            self.watcher.stop()
+        self.dispatcher.stop()
+        # Flush pending saves before the process goes away
+        self.config.close()
         self.root.quit()
         sys.exit(0)
     
     def run(self):
         """Run the application"""
-        print(f"Shortcut Helper running. Press {SHORTCUT_TRIGGER} to show shortcuts.")
+        log.info("Shortcut Helper running. Press %s to show shortcuts.", SHORTCUT_TRIGGER)
         self.root.mainloop()
 
 
@@ -547,12 +822,15 @@ if __name__ == "__main__":
         sys.exit(1)
     
     # Set process DPI awareness (Windows 8.1+)
+    import ctypes
     try:
         ctypes.windll.shcore.SetProcessDpiAwareness(1)
     except AttributeError:
         # Windows 8.0 and below
         ctypes.windll.user32.SetProcessDPIAware()
     
+    configure_logging()
+    
     # Create and run the application
     app = ShortcutHelper()
     app.run()
\ No newline at end of file
@@ -1,22 +1,32 @@
 import tkinter as tk
+from src.ui.background import BackgroundLoader
 from src.ui.main_window import MainWindow
 from src.shortcuts.manager import ShortcutManager
 from src.utils.config import ConfigManager
+from src.utils.log import get_logger
+
+log = get_logger(__name__)
 
 class ShortcutHelperApp:
     def __init__(self):
-        print("Initializing ShortcutHelperApp")
+        log.debug("Initializing ShortcutHelperApp")
         # Initialize configuration
         self.config = ConfigManager()
-        
-        # Initialize shortcut database
-        self.shortcuts = ShortcutManager(self.config)
-        
+
         # Create main window
         self.root = tk.Tk()
-        self.window = MainWindow(self.root, self.shortcuts, self.config)
-        
+
+        # The shortcut database is parsed in the background once the window is up
+        self.loader = BackgroundLoader(self.root, lambda: ShortcutManager(self.config),
+                                       name="ShortcutLoader")
+        self.window = MainWindow(self.root, None, self.config, loader=self.loader)
+
     def run(self):
         """Run the application"""
         self.window.setup()
-        self.root.mainloop()
\ No newline at end of file
+        self.loader.start()
+        try:
+            self.root.mainloop()
+        finally:
+            # Flush pending saves before the process goes away
+            self.config.close()
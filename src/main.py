@@ -1,7 +1,9 @@
 import sys
 from src.app import ShortcutHelperApp
+from src.utils.log import configure_logging
 
 def main():
+    configure_logging()
     app = ShortcutHelperApp()
     app.run()
     return 0
@@ -0,0 +1,195 @@
+import re
+from collections import namedtuple
+from itertools import product
+
+# Modifier bits
+MOD_CTRL = 1
+MOD_SHIFT = 2
+MOD_ALT = 4
+MOD_WIN = 8
+
+MODIFIERS = {
+    "ctrl": MOD_CTRL,
+    "control": MOD_CTRL,
+    "shift": MOD_SHIFT,
+    "alt": MOD_ALT,
+    "option": MOD_ALT,
+    "win": MOD_WIN,
+    "windows": MOD_WIN,
+    "meta": MOD_WIN,
+    "super": MOD_WIN,
+}
+
+# Display order of modifiers in canonical key strings
+MODIFIER_ORDER = [(MOD_CTRL, "Ctrl"), (MOD_SHIFT, "Shift"), (MOD_ALT, "Alt"), (MOD_WIN, "Win")]
+
+# Windows virtual-key codes for named keys
+NAMED_KEYS = {
+    "Backspace": 0x08,
+    "Tab": 0x09,
+    "Enter": 0x0D,
+    "Pause": 0x13,
+    "CapsLock": 0x14,
+    "Escape": 0x1B,
+    "Space": 0x20,
+    "PageUp": 0x21,
+    "PageDown": 0x22,
+    "End": 0x23,
+    "Home": 0x24,
+    "Left": 0x25,
+    "Up": 0x26,
+    "Right": 0x27,
+    "Down": 0x28,
+    "PrintScreen": 0x2C,
+    "Insert": 0x2D,
+    "Delete": 0x2E,
+    ";": 0xBA,
+    "+": 0xBB,
+    ",": 0xBC,
+    "-": 0xBD,
+    ".": 0xBE,
+    "/": 0xBF,
+    "`": 0xC0,
+    "[": 0xDB,
+    "\\": 0xDC,
+    "]": 0xDD,
+    "'": 0xDE,
+}
+NAMED_KEYS.update({f"F{n}": 0x6F + n for n in range(1, 25)})
+NAMED_KEYS.update({chr(c): c for c in range(ord("0"), ord("9") + 1)})
+NAMED_KEYS.update({chr(c): c for c in range(ord("A"), ord("Z") + 1)})
+
+# Alternative spellings, looked up in lowercase
+KEY_ALIASES = {name.lower(): name for name in NAMED_KEYS}
+KEY_ALIASES.update({
+    "↑": "Up",
+    "↓": "Down",
+    "←": "Left",
+    "→": "Right",
+    "esc": "Escape",
+    "return": "Enter",
+    "del": "Delete",
+    "ins": "Insert",
+    "pgup": "PageUp",
+    "pgdn": "PageDown",
+    "pagedown": "PageDown",
+    "spacebar": "Space",
+    "prtsc": "PrintScreen",
+    "=": "+",
+})
+
+KEY_NAMES = {code: name for name, code in NAMED_KEYS.items()}
+
+# Separators between alternative key combinations: "A, B", "A / B", "A or B",
+# captured so a bare key after " / " can be told apart. A comma directly
+# after "+" is the comma key itself.
+ALTERNATIVES_RE = re.compile(r"((?<!\+)\s*,\s*|\s+/\s+|\s+or\s+)", re.IGNORECASE)
+RANGE_RE = re.compile(r"^(?:F(\d+)\.\.F?(\d+)|(\w)\.\.(\w))$", re.IGNORECASE)
+
+
+class Chord(namedtuple("Chord", ["mods", "key"])):
+    """A single key press: a modifier bitmask plus a virtual-key code"""
+    __slots__ = ()
+
+    def __str__(self):
+        names = [name for bit, name in MODIFIER_ORDER if self.mods & bit]
+        names.append(KEY_NAMES[self.key])
+        return "+".join(names)
+
+
+def format_sequence(sequence):
+    """Format a chord sequence as a canonical key string, e.g. "Ctrl+K Z" """
+    return " ".join(str(chord) for chord in sequence)
+
+
+def _expand_key(spec):
+    """Expand a key spec into key codes, or None if it is not a key.
+
+    Handles ranges ("1..8", "F1..F4") and slash lists ("↑/↓").
+    """
+    name = KEY_ALIASES.get(spec.lower())
+    if name is not None:
+        return [NAMED_KEYS[name]]
+
+    match = RANGE_RE.match(spec)
+    if match:
+        first_f, last_f, first, last = match.groups()
+        if first_f:
+            names = [f"F{n}" for n in range(int(first_f), int(last_f) + 1)]
+        else:
+            names = [chr(c) for c in range(ord(first.upper()), ord(last.upper()) + 1)]
+        codes = [NAMED_KEYS[n] for n in names if n in NAMED_KEYS]
+        return codes or None
+
+    if "/" in spec:
+        codes = []
+        for part in spec.split("/"):
+            part_codes = _expand_key(part) if part else None
+            if part_codes is None:
+                return None
+            codes.extend(part_codes)
+        return codes
+
+    return None
+
+
+def _parse_chord(text):
+    """Parse "Ctrl+Shift+P" into a list of chords (several when the key is a range or list)"""
+    if text.endswith("++"):
+        parts = text[:-2].split("+") + ["+"]
+    else:
+        parts = text.split("+")
+
+    mods = 0
+    for part in parts[:-1]:
+        bit = MODIFIERS.get(part.lower())
+        if bit is None:
+            return None
+        mods |= bit
+
+    codes = _expand_key(parts[-1])
+    if codes is None:
+        return None
+    return [Chord(mods, code) for code in codes]
+
+
+def parse_keys(text):
+    """Parse a free-text keys field into a list of canonical chord sequences.
+
+    "F5 / Ctrl+R" gives two one-chord sequences, "Ctrl+K Z" one two-chord
+    sequence and "Alt+↑/↓" or "Alt+↑ / ↓" one sequence per arrow: a bare
+    key after a slash keeps the modifiers of the chord before it.
+    Alternatives that are not key presses, like "Shift+Right Click > Copy
+    Path", are skipped.
+    """
+    sequences = []
+    parts = ALTERNATIVES_RE.split(text.strip())
+    previous = None  # steps of the alternative before, if it was a key press
+    for i in range(0, len(parts), 2):
+        alternative = parts[i]
+        if not alternative:
+            previous = None
+            continue
+
+        steps = []
+        for chord_text in alternative.split():
+            chords = _parse_chord(chord_text)
+            if chords is None:
+                steps = None
+                break
+            steps.append(chords)
+
+        if not steps:
+            previous = None
+            continue
+
+        # "Ctrl+1 / 2" means Ctrl+2, not a bare 2
+        if (previous and i and parts[i - 1].strip() == "/"
+                and len(steps) == 1 and "+" not in alternative):
+            mods = previous[-1][0].mods
+            steps = previous[:-1] + [[Chord(mods, chord.key) for chord in steps[0]]]
+        previous = steps
+        for sequence in product(*steps):
+            if sequence not in sequences:
+                sequences.append(sequence)
+    return sequences
@@ -0,0 +1,317 @@
+"""Columnar shortcut storage for very large databases.
+
+ColumnarShortcutDB keeps one uint32 array per field, holding ids into a
+shared string table, and the row range of each application. A shortcut
+costs 16 bytes of column data instead of a Python object, and lookups
+hand out ShortcutViews that decode rows only when they are read.
+
+Grouping and search run over the columns. Search matches query tokens
+against the string table once, since every distinct string is stored
+only once, and then only compares ids. NumPy is used for the column
+scans when it is installed; the pure-Python paths give the same results.
+"""
+from array import array
+from bisect import bisect_left
+from collections.abc import MutableMapping, Sequence
+
+from src.shortcuts.pack import MISSING
+from src.shortcuts.record import FIELDS, Shortcut
+from src.shortcuts.search import SEARCH_FIELDS, tokenize
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CATEGORY = FIELDS.index("category")
+SEARCH_COLUMNS = tuple(FIELDS.index(field) for field in SEARCH_FIELDS)
+
+# Prefix lookups remembered between keystrokes
+PREFIX_CACHE_SIZE = 256
+
+
+def _uint32_array(values):
+    """Get values as an array('I'), copying from NumPy without a Python loop"""
+    if np is not None and isinstance(values, np.ndarray):
+        rows = array("I")
+        rows.frombytes(values.astype(np.uint32).tobytes())
+        return rows
+    return array("I", values)
+
+
+class ShortcutView(Sequence):
+    """Read-only sequence of rows of a ColumnarShortcutDB, decoded on access"""
+    __slots__ = ("db", "rows")
+
+    def __init__(self, db, rows):
+        self.db = db
+        self.rows = rows  # range or array of row numbers
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ShortcutView(self.db, self.rows[index])
+        return self.db.row(self.rows[index])
+
+    def __iter__(self):
+        row = self.db.row
+        for row_number in self.rows:
+            yield row(row_number)
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence) or len(self) != len(other):
+            return False
+        return all(a == b for a, b in zip(self, other))
+
+    def __repr__(self):
+        return f"<ShortcutView of {len(self.rows)} shortcuts>"
+
+
+class _AppSearch:
+    """Search over one application's rows, standing in for a SearchIndex"""
+
+    def __init__(self, db, app_name):
+        self.db = db
+        self.app_name = app_name
+
+    def __len__(self):
+        return self.db.count(self.app_name)
+
+    def search(self, query):
+        """Get the shortcuts matching query, in their original order"""
+        return self.db.search(self.app_name, query)
+
+
+class ColumnarShortcutDB(MutableMapping):
+    """Shortcut database stored as uint32 columns over a shared string table.
+
+    Apps written after loading are kept as plain record lists on top of
+    the columns, like LazyShortcutDB does.
+    """
+
+    def __init__(self, strings, columns, app_ranges):
+        self.strings = strings  # string id -> str
+        self.columns = columns  # one array('I') of string ids per field in FIELDS
+        self.app_ranges = app_ranges  # app name -> (first row, row count)
+        self.modified = {}
+        self.deleted = set()
+        self._np_columns = None
+        self._vocabulary = None
+        self._prefix_cache = {}
+
+    @classmethod
+    def from_db(cls, shortcuts_db):
+        """Build the columns from {app: [shortcuts]}"""
+        string_ids = {}
+        columns = tuple(array("I") for _ in FIELDS)
+        app_ranges = {}
+
+        def string_id(value):
+            if value is None:
+                return MISSING
+            sid = string_ids.get(value)
+            if sid is None:
+                sid = string_ids[value] = len(string_ids)
+            return sid
+
+        for app_name, shortcuts in shortcuts_db.items():
+            app_ranges[app_name] = (len(columns[0]), len(shortcuts))
+            for shortcut in shortcuts:
+                for column, field in zip(columns, FIELDS):
+                    column.append(string_id(shortcut.get(field)))
+        return cls(list(string_ids), columns, app_ranges)
+
+    @classmethod
+    def from_pack(cls, pack):
+        """Copy the columns out of a PackReader; the pack can be closed afterwards"""
+        width = len(FIELDS)
+        if np is not None:
+            records = np.frombuffer(pack.records(), dtype=np.uint32).reshape(-1, width)
+            columns = tuple(_uint32_array(records[:, i]) for i in range(width))
+        else:
+            records = pack.records().tolist()
+            columns = tuple(array("I", records[i::width]) for i in range(width))
+        return cls(list(pack.strings()), columns, dict(pack.app_index()))
+
+    def copy(self):
+        """Get a database over the same columns whose edits don't affect this one"""
+        db = object.__new__(ColumnarShortcutDB)
+        db.__dict__.update(self.__dict__)
+        db.modified = dict(self.modified)
+        db.deleted = set(self.deleted)
+        return db
+
+    def _columnar_range(self, app_name):
+        """Get the row range of an app served from the columns, or None"""
+        if app_name in self.modified or app_name in self.deleted:
+            return None
+        return self.app_ranges.get(app_name)
+
+    def row(self, row_number):
+        """Decode one row into a Shortcut"""
+        strings = self.strings
+        return tuple.__new__(Shortcut, [
+            None if (sid := column[row_number]) == MISSING else strings[sid]
+            for column in self.columns
+        ])
+
+    def __getitem__(self, app_name):
+        if app_name in self.modified:
+            return self.modified[app_name]
+        app_range = self._columnar_range(app_name)
+        if app_range is None:
+            raise KeyError(app_name)
+        first, count = app_range
+        return ShortcutView(self, range(first, first + count))
+
+    def __setitem__(self, app_name, shortcuts):
+        self.modified[app_name] = shortcuts
+        self.deleted.discard(app_name)
+
+    def __delitem__(self, app_name):
+        if app_name not in self:
+            raise KeyError(app_name)
+        self.modified.pop(app_name, None)
+        if app_name in self.app_ranges:
+            self.deleted.add(app_name)
+
+    def __contains__(self, app_name):
+        if app_name in self.modified:
+            return True
+        return app_name in self.app_ranges and app_name not in self.deleted
+
+    def __iter__(self):
+        for app_name in self.app_ranges:
+            if app_name not in self.deleted and app_name not in self.modified:
+                yield app_name
+        yield from self.modified
+
+    def __len__(self):
+        packed = sum(1 for app_name in self.app_ranges
+                     if app_name not in self.deleted and app_name not in self.modified)
+        return packed + len(self.modified)
+
+    def count(self, app_name):
+        """Get the number of shortcuts of an app"""
+        if app_name in self.modified:
+            return len(self.modified[app_name])
+        app_range = self._columnar_range(app_name)
+        return 0 if app_range is None else app_range[1]
+
+    def packed_columns(self):
+        """Get (strings, columns, app ranges) of the apps still served from the columns"""
+        app_ranges = {app_name: app_range for app_name, app_range in self.app_ranges.items()
+                      if app_name not in self.modified and app_name not in self.deleted}
+        return self.strings, self.columns, app_ranges
+
+    def close(self):
+        """Nothing to release; the columns are plain arrays"""
+
+    def _numpy_columns(self):
+        if self._np_columns is None:
+            self._np_columns = tuple(np.frombuffer(column, dtype=np.uint32) for column in self.columns)
+        return self._np_columns
+
+    def group(self, app_name):
+        """Group an app's rows by category, in first-seen order.
+
+        Returns a tuple of (category name, ShortcutView), or None if the
+        app isn't served from the columns.
+        """
+        app_range = self._columnar_range(app_name)
+        if app_range is None:
+            return None
+        first, count = app_range
+        if count == 0:
+            return ()
+
+        if np is not None:
+            categories = self._numpy_columns()[CATEGORY][first:first + count]
+            ids, first_seen, inverse = np.unique(categories, return_index=True, return_inverse=True)
+            by_category = np.argsort(inverse, kind="stable") + first
+            ends = np.cumsum(np.bincount(inverse, minlength=len(ids)))
+            starts = ends - np.bincount(inverse, minlength=len(ids))
+            groups = [(int(ids[k]), _uint32_array(by_category[starts[k]:ends[k]]))
+                      for k in np.argsort(first_seen)]
+        else:
+            rows_by_id = {}
+            for row_number, sid in enumerate(self.columns[CATEGORY][first:first + count], first):
+                rows = rows_by_id.get(sid)
+                if rows is None:
+                    rows = rows_by_id[sid] = []
+                rows.append(row_number)
+            groups = [(sid, array("I", rows)) for sid, rows in rows_by_id.items()]
+
+        # A missing category shows as "General", merged with an explicit one
+        named = {}
+        for sid, rows in groups:
+            name = "General" if sid == MISSING else self.strings[sid]
+            if name in named:
+                rows = array("I", sorted(named[name] + rows))
+            named[name] = rows
+        return tuple((name, ShortcutView(self, rows)) for name, rows in named.items())
+
+    def _prefix_string_ids(self, prefix):
+        """Get the ids of the strings with a search token starting with prefix"""
+        ids = self._prefix_cache.get(prefix)
+        if ids is not None:
+            return ids
+
+        if self._vocabulary is None:
+            postings = {}
+            for sid, value in enumerate(self.strings):
+                for token in set(tokenize(value)):
+                    postings.setdefault(token, []).append(sid)
+            self._vocabulary = (sorted(postings), postings)
+        vocabulary, postings = self._vocabulary
+
+        ids = set()
+        for token in vocabulary[bisect_left(vocabulary, prefix):]:
+            if not token.startswith(prefix):
+                break
+            ids.update(postings[token])
+
+        if len(self._prefix_cache) >= PREFIX_CACHE_SIZE:
+            self._prefix_cache.clear()
+        self._prefix_cache[prefix] = ids
+        return ids
+
+    def search(self, app_name, query):
+        """Get an app's shortcuts matching every token of query as a prefix, in order"""
+        app_range = self._columnar_range(app_name)
+        if app_range is None:
+            raise KeyError(app_name)
+        first, count = app_range
+        tokens = set(tokenize(query))
+        if not tokens:
+            return ShortcutView(self, range(first, first + count))
+
+        token_ids = sorted((self._prefix_string_ids(token) for token in tokens), key=len)
+        if not token_ids[0]:
+            return ShortcutView(self, ())
+
+        if np is not None:
+            columns = [self._numpy_columns()[i][first:first + count] for i in SEARCH_COLUMNS]
+            mask = np.ones(count, dtype=bool)
+            for ids in token_ids:
+                wanted = np.fromiter(ids, dtype=np.uint32, count=len(ids))
+                matches = np.zeros(count, dtype=bool)
+                for column in columns:
+                    matches |= np.isin(column, wanted)
+                mask &= matches
+            return ShortcutView(self, _uint32_array(np.flatnonzero(mask) + first))
+
+        columns = [self.columns[i] for i in SEARCH_COLUMNS]
+        rows = array("I", (
+            row_number for row_number in range(first, first + count)
+            if all(any(column[row_number] in ids for column in columns) for ids in token_ids)
+        ))
+        return ShortcutView(self, rows)
+
+    def search_index(self, app_name):
+        """Get a SearchIndex stand-in for an app served from the columns, or None"""
+        if self._columnar_range(app_name) is None:
+            return None
+        return _AppSearch(self, app_name)
@@ -0,0 +1,301 @@
+"""Foreground window detection.
+
+A ForegroundDetector is fed by a backend that pushes an event whenever
+another process takes the foreground, so the current process is already
+known by the time the hotkey fires.
+"""
+import os
+import re
+import sys
+import threading
+
+
+class DetectorBackend:
+    """Source of foreground-change events.
+
+    Backends call on_change(pid, process_name) from any thread whenever
+    the foreground process may have changed.
+    """
+
+    def start(self, on_change):
+        """Start delivering events to on_change, beginning with the current foreground process.
+
+        Must not block: the first lookup happens on the backend's own thread.
+        """
+        raise NotImplementedError
+
+    def stop(self):
+        """Stop delivering events"""
+        raise NotImplementedError
+
+    def current(self):
+        """Look up the foreground process synchronously, as (pid, name) or None"""
+        raise NotImplementedError
+
+
+class FakeBackend(DetectorBackend):
+    """In-process backend driven by emit(), for tests and benchmarks"""
+
+    def __init__(self):
+        self.on_change = None
+        self.foreground = None
+
+    def start(self, on_change):
+        self.on_change = on_change
+        if self.foreground is not None:
+            on_change(*self.foreground)
+
+    def stop(self):
+        self.on_change = None
+
+    def current(self):
+        return self.foreground
+
+    def emit(self, process_name, pid=1):
+        """Pretend process_name just took the foreground"""
+        self.foreground = (pid, process_name)
+        if self.on_change is not None:
+            self.on_change(pid, process_name)
+
+
+def read_proc_name(pid):
+    """Get a process name from /proc, or None if the process is gone"""
+    try:
+        with open(f"/proc/{pid}/comm", "r") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+# Prints the active window once on start, then again whenever it changes
+XPROP_SPY = ["xprop", "-root", "-spy", "_NET_ACTIVE_WINDOW"]
+# "_NET_ACTIVE_WINDOW(WINDOW): window id # 0x3a00007"
+WINDOW_ID_RE = re.compile(r"#\s*(0x[0-9a-fA-F]+)")
+
+
+def parse_window_id(line):
+    """Get the window id from an xprop _NET_ACTIVE_WINDOW line, or None if there is none"""
+    match = WINDOW_ID_RE.search(line)
+    window_id = int(match.group(1), 16) if match else 0
+    return window_id or None
+
+
+def x11_window_pid(window_id):
+    """Get the pid owning an X11 window using xprop, or None"""
+    import subprocess
+    try:
+        output = subprocess.run(
+            ["xprop", "-id", hex(window_id), "_NET_WM_PID"],
+            capture_output=True, text=True, timeout=1
+        ).stdout
+        return int(output.split()[-1])
+    except (OSError, subprocess.SubprocessError, IndexError, ValueError):
+        return None
+
+
+def x11_active_pid():
+    """Get the pid owning the active X11 window using xprop, or None"""
+    import subprocess
+    try:
+        output = subprocess.run(
+            ["xprop", "-root", "_NET_ACTIVE_WINDOW"],
+            capture_output=True, text=True, timeout=1
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    window_id = parse_window_id(output)
+    return x11_window_pid(window_id) if window_id is not None else None
+
+
+class LinuxProcBackend(DetectorBackend):
+    """Linux backend that follows _NET_ACTIVE_WINDOW and names processes from /proc.
+
+    One long-lived "xprop -root -spy" process prints a line whenever the
+    active window changes; a daemon thread reads them, resolves the
+    window's pid and only emits an event when the pid changes. Nothing
+    runs while focus stays put. active_pid is used for synchronous
+    lookups through current().
+    """
+
+    def __init__(self, active_pid=x11_active_pid, window_pid=x11_window_pid, spy_command=XPROP_SPY):
+        self.active_pid = active_pid
+        self.window_pid = window_pid
+        self.spy_command = spy_command
+        self._lock = threading.Lock()
+        self._process = None
+        self._stopped = False
+        self._thread = None
+
+    def start(self, on_change):
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, args=(on_change,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            if self._process is not None:
+                self._process.terminate()
+
+    def current(self):
+        pid = self.active_pid()
+        if pid is None:
+            return None
+        name = read_proc_name(pid)
+        return (pid, name) if name else None
+
+    def _run(self, on_change):
+        import subprocess
+        # Started here rather than in start() to keep the fork off the caller's thread
+        with self._lock:
+            if self._stopped:
+                return
+            try:
+                self._process = subprocess.Popen(
+                    self.spy_command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                    text=True, bufsize=1)
+            except OSError:
+                return
+            process = self._process
+
+        last_pid = None
+        # The first line is the window active when xprop started
+        for line in process.stdout:
+            window_id = parse_window_id(line)
+            if window_id is None:
+                continue
+            pid = self.window_pid(window_id)
+            if pid is not None and pid != last_pid:
+                name = read_proc_name(pid)
+                if name:
+                    last_pid = pid
+                    on_change(pid, name)
+        process.stdout.close()
+        process.wait()
+
+
+class Win32Backend(DetectorBackend):
+    """Windows backend using a SetWinEventHook(EVENT_SYSTEM_FOREGROUND) hook.
+
+    The hook runs on its own thread with a message loop, so process names
+    are resolved there rather than on the hotkey path.
+    """
+
+    EVENT_SYSTEM_FOREGROUND = 0x0003
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    WM_QUIT = 0x0012
+
+    def __init__(self):
+        self._thread = None
+        self._thread_id = None
+
+    def start(self, on_change):
+        self._thread = threading.Thread(target=self._run, args=(on_change,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        import ctypes
+        if self._thread_id is not None:
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, self.WM_QUIT, 0, 0)
+
+    def current(self):
+        import ctypes
+        return self._process_of(ctypes.windll.user32.GetForegroundWindow())
+
+    def _process_of(self, hwnd):
+        """Get (pid, name) for the process owning a window"""
+        import ctypes
+        from ctypes import wintypes
+        from src.utils.system import get_process_name
+
+        pid = wintypes.DWORD()
+        ctypes.windll.user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+        name = get_process_name(pid.value)
+        return (pid.value, name) if name else None
+
+    def _run(self, on_change):
+        import ctypes
+        from ctypes import wintypes
+
+        user32 = ctypes.windll.user32
+        self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+
+        WinEventProc = ctypes.WINFUNCTYPE(
+            None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+            wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD
+        )
+
+        def callback(hook, event, hwnd, id_object, id_child, thread, time):
+            process = self._process_of(hwnd)
+            if process is not None:
+                on_change(*process)
+
+        # Keep a reference so the callback isn't garbage collected
+        self._callback = WinEventProc(callback)
+        hook = user32.SetWinEventHook(
+            self.EVENT_SYSTEM_FOREGROUND, self.EVENT_SYSTEM_FOREGROUND,
+            0, self._callback, 0, 0, self.WINEVENT_OUTOFCONTEXT
+        )
+
+        # Report the window that already has the foreground
+        process = self._process_of(user32.GetForegroundWindow())
+        if process is not None:
+            on_change(*process)
+
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        user32.UnhookWinEvent(hook)
+
+
+def create_backend():
+    """Get the backend for the current platform, or None if there is none"""
+    if sys.platform == "win32":
+        return Win32Backend()
+    if sys.platform.startswith("linux"):
+        import shutil
+        if not shutil.which("xprop"):
+            return None
+        return LinuxProcBackend()
+    return None
+
+
+class ForegroundDetector:
+    """Tracks the foreground process from backend events.
+
+    Focus moving to our own window is ignored, so the current process
+    stays the app the user was in when they opened the overlay.
+    """
+
+    def __init__(self, backend, ignore_pids=None):
+        self.backend = backend
+        self.ignore_pids = {os.getpid()} if ignore_pids is None else set(ignore_pids)
+        self.current = None  # (pid, process name), replaced atomically
+        self.listeners = []
+
+    def add_listener(self, callback):
+        """Call callback(process_name) on the backend's thread whenever the foreground app changes"""
+        self.listeners.append(callback)
+
+    def start(self):
+        """Start tracking; the backend reports the current process from its own thread"""
+        self.backend.start(self.on_change)
+
+    def stop(self):
+        """Stop tracking"""
+        self.backend.stop()
+
+    def on_change(self, pid, process_name):
+        """Backend callback"""
+        if pid in self.ignore_pids or self.current == (pid, process_name):
+            return
+
+        self.current = (pid, process_name)
+        for callback in self.listeners:
+            callback(process_name)
+
+    def get_current_process(self):
+        """Get the name of the foreground process, or None if not known yet"""
+        current = self.current
+        return current[1] if current is not None else None
@@ -0,0 +1,246 @@
+"""Ranked, typo tolerant search across every application.
+
+FuzzyIndex matches the trigrams of the query words against the trigrams
+of the field values, so "comand palete" still finds "Command Palette".
+Field values repeat heavily across shortcuts and apps, so each field's
+trigram index is built over its distinct values, and only the values
+that match are expanded to the shortcuts using them.
+
+Shortcuts bound to the key chord the query names rank first. Text
+matches follow by the share of the query's trigrams the value contains,
+weighted by field so a description outranks an equally good category or
+detail match. Matches are merged lazily and stop at the result limit.
+
+Over a lazy or columnar database the index reads the string table and
+string id columns directly and only decodes the shortcuts it returns,
+so indexing every app doesn't load every app.
+"""
+from array import array
+from bisect import bisect_left
+from collections import Counter, namedtuple
+from heapq import merge
+from itertools import repeat
+from operator import itemgetter
+
+from src.shortcuts.chords import parse_keys
+from src.shortcuts.pack import MISSING
+from src.shortcuts.record import FIELDS, Shortcut, to_records
+from src.shortcuts.search import tokenize
+
+# Weight of a text match per field; keys are matched as parsed chords instead
+FIELD_WEIGHTS = {"description": 1.0, "category": 0.8, "detail": 0.6}
+# Score of a shortcut bound to the chord the query names, above any text match
+CHORD_SCORE = 2.0
+# Share of the query's trigrams a value must contain to match
+MIN_SIMILARITY = 0.5
+# Matches returned when no limit is given
+DEFAULT_LIMIT = 50
+
+# F1..F24, which name a chord without any modifier
+FUNCTION_KEYS = range(0x70, 0x88)
+
+# One result: the field that matched ("keys" for a chord) and its score
+FuzzyMatch = namedtuple("FuzzyMatch", ["app", "shortcut", "field", "score"])
+
+
+def trigrams(text, partial=False):
+    """Get the trigrams of the words in text, padded so word starts and ends count.
+
+    With partial, the last word may still be being typed and its end isn't padded.
+    """
+    grams = set()
+    tokens = tokenize(text)
+    for i, token in enumerate(tokens):
+        padded = f" {token}" if partial and i == len(tokens) - 1 else f" {token} "
+        grams.update(padded[j:j + 3] for j in range(len(padded) - 2))
+    return grams
+
+
+def _names_chord(sequence):
+    """Check whether a parsed query is a key chord rather than a plain word like "a" """
+    return any(chord.mods or chord.key in FUNCTION_KEYS for chord in sequence)
+
+
+def _group_values(column):
+    """Get the distinct values of a column and the ascending entry ids holding each"""
+    value_ids = {}
+    values = []
+    entries = []
+    for entry_id, value in enumerate(column):
+        if not value:
+            continue
+        vid = value_ids.get(value)
+        if vid is None:
+            value_ids[value] = len(values)
+            values.append(value)
+            entries.append([entry_id])
+        else:
+            entries[vid].append(entry_id)
+    return values, entries
+
+
+class _FieldIndex:
+    """Trigram postings over the distinct values of one field"""
+
+    def __init__(self, field, weight, column):
+        self.field = field
+        self.weight = weight
+        self.values, self.entries = _group_values(column)
+        self.sizes = []  # value id -> number of trigrams
+        self.postings = {}  # trigram -> ids of the values containing it
+        postings = self.postings
+        for vid, value in enumerate(self.values):
+            grams = trigrams(value)
+            self.sizes.append(len(grams))
+            for gram in grams:
+                ids = postings.get(gram)
+                if ids is None:
+                    postings[gram] = [vid]
+                else:
+                    ids.append(vid)
+
+    def ranked(self, grams):
+        """Yield (score, field, entry ids) for the values matching grams, best first"""
+        hits = Counter()
+        for gram in grams:
+            ids = self.postings.get(gram)
+            if ids:
+                hits.update(ids)
+
+        needed = MIN_SIMILARITY * len(grams)
+        buckets = {}
+        for vid, shared in hits.items():
+            if shared >= needed:
+                bucket = buckets.get(shared)
+                if bucket is None:
+                    buckets[shared] = [vid]
+                else:
+                    bucket.append(vid)
+
+        # Sorted lazily, since the caller usually stops after the best few
+        for shared in sorted(buckets, reverse=True):
+            score = self.weight * shared / len(grams)
+            # Ties go to the value with the fewest trigrams the query lacks
+            for vid in sorted(buckets[shared], key=self.sizes.__getitem__):
+                yield score, self.field, self.entries[vid]
+
+
+class FuzzyIndex:
+    """Trigram index over every shortcut in {app: [shortcuts]}.
+
+    A query counts trigram hits over the distinct values of each field
+    instead of scanning every shortcut, so it stays in the low
+    milliseconds at 100k shortcuts. Databases with packed_columns(), like
+    LazyShortcutDB and ColumnarShortcutDB, are indexed from their string
+    tables; only the apps edited since loading are read as records.
+    """
+
+    def __init__(self, shortcuts_db):
+        self.apps = []  # entry id -> app name
+        self.app_ranges = {}  # app name -> (first entry id, end entry id)
+        # Entries below len(rows) are packed records, by row number in
+        # columns; the rest are Shortcuts from self.shortcuts
+        self.rows = array("I")
+        self.shortcuts = []
+        self.strings = None
+        self.columns = None
+
+        packed_ranges = {}
+        if hasattr(shortcuts_db, "packed_columns"):
+            self.strings, self.columns, packed_ranges = shortcuts_db.packed_columns()
+            for app_name, (first, count) in packed_ranges.items():
+                self.rows.extend(range(first, first + count))
+                self._add_app(app_name, count)
+        # Looked up by name so a lazy database only reads the apps it must
+        for app_name in shortcuts_db:
+            if app_name not in packed_ranges:
+                shortcuts = shortcuts_db[app_name]
+                self.shortcuts.extend(to_records(shortcuts))
+                self._add_app(app_name, len(shortcuts))
+
+        self.fields = [_FieldIndex(field, weight, self._column(field)) for field, weight in FIELD_WEIGHTS.items()]
+
+        # chord sequence -> entry ids bound to it, parsing each distinct keys value once
+        chord_entries = {}
+        for value, entry_ids in zip(*_group_values(self._column("keys"))):
+            for sequence in parse_keys(value):
+                chord_entries.setdefault(sequence, []).extend(entry_ids)
+        self.chord_entries = {sequence: sorted(set(ids)) for sequence, ids in chord_entries.items()}
+
+    def _add_app(self, app_name, count):
+        first = len(self.apps)
+        self.apps.extend(repeat(app_name, count))
+        self.app_ranges[app_name] = (first, len(self.apps))
+
+    def _column(self, field):
+        """Iterate over one field of every entry, in entry id order"""
+        i = FIELDS.index(field)
+        if self.rows:
+            column = self.columns[i]
+            strings = self.strings
+            for row in self.rows:
+                string_id = column[row]
+                yield None if string_id == MISSING else strings[string_id]
+        # Plain tuple indexing skips Shortcut's dict-style __getitem__
+        yield from map(tuple.__getitem__, self.shortcuts, repeat(i))
+
+    def shortcut(self, entry_id):
+        """Get the Shortcut of an entry, decoding packed ones"""
+        if entry_id >= len(self.rows):
+            return self.shortcuts[entry_id - len(self.rows)]
+        row = self.rows[entry_id]
+        strings = self.strings
+        return tuple.__new__(Shortcut, [
+            None if (string_id := column[row]) == MISSING else strings[string_id]
+            for column in self.columns
+        ])
+
+    def __len__(self):
+        return len(self.apps)
+
+    def _ranked(self, query):
+        """Yield (score, field, entry ids) for everything matching query, best first"""
+        sequences = [sequence for sequence in parse_keys(query) if _names_chord(sequence)]
+        if sequences:
+            ids = set()
+            for sequence in sequences:
+                ids.update(self.chord_entries.get(sequence, ()))
+            yield CHORD_SCORE, "keys", sorted(ids)
+
+        grams = trigrams(query, partial=True)
+        if grams:
+            yield from merge(*(index.ranked(grams) for index in self.fields),
+                             key=itemgetter(0), reverse=True)
+
+    def search(self, query, limit=DEFAULT_LIMIT, app_name=None):
+        """Get the best limit FuzzyMatches for query, best first.
+
+        Searches every app, or only app_name when given.
+        """
+        first, end = 0, len(self.apps)
+        if app_name is not None:
+            if app_name not in self.app_ranges:
+                return []
+            first, end = self.app_ranges[app_name]
+
+        # Matches come best first, so a shortcut's first appearance is its best one
+        matches = []
+        seen = set()
+        for score, field, entry_ids in self._ranked(query):
+            if app_name is not None:
+                entry_ids = entry_ids[bisect_left(entry_ids, first):bisect_left(entry_ids, end)]
+            for entry_id in entry_ids:
+                if entry_id in seen:
+                    continue
+                seen.add(entry_id)
+                matches.append(FuzzyMatch(self.apps[entry_id], self.shortcut(entry_id), field, score))
+                if len(matches) >= limit:
+                    return matches
+        return matches
+
+    def lookup_keys(self, keys):
+        """Get the (app, shortcut) pairs bound to a key string such as "Ctrl+K" in any app"""
+        entry_ids = set()
+        for sequence in parse_keys(keys):
+            entry_ids.update(self.chord_entries.get(sequence, ()))
+        return [(self.apps[entry_id], self.shortcut(entry_id)) for entry_id in sorted(entry_ids)]
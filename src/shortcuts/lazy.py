@@ -0,0 +1,111 @@
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+from src.shortcuts.record import FIELDS
+
+
+class LazyShortcutDB(MutableMapping):
+    """Shortcuts database that decodes applications from a pack on demand.
+
+    Only the pack's app index is read up front. An app's shortcut list is
+    decoded the first time it is looked up, and at most max_apps decoded
+    lists are kept, least recently used first out. Apps assigned at
+    runtime are held separately and never evicted, so edits must replace
+    an app's list rather than mutate it in place.
+
+    Lookups are safe from several threads; copies share the pack and the
+    decoded apps, which only ever hold pack contents.
+    """
+
+    def __init__(self, pack, max_apps=8):
+        self.pack = pack
+        self.max_apps = max_apps
+        self.app_counts = {name: count for name, (_, count) in pack.app_index().items()}
+        self.decoded = OrderedDict()
+        self.decoded_lock = threading.Lock()
+        self.modified = {}
+        self.deleted = set()
+
+    def copy(self):
+        """Get a database over the same pack whose edits don't affect this one"""
+        db = object.__new__(LazyShortcutDB)
+        db.__dict__.update(self.__dict__)
+        db.modified = dict(self.modified)
+        db.deleted = set(self.deleted)
+        return db
+
+    def __getitem__(self, app_name):
+        if app_name in self.modified:
+            return self.modified[app_name]
+        if app_name in self.deleted or app_name not in self.app_counts:
+            raise KeyError(app_name)
+
+        with self.decoded_lock:
+            shortcuts = self.decoded.get(app_name)
+            if shortcuts is not None:
+                self.decoded.move_to_end(app_name)
+                return shortcuts
+
+        shortcuts = self.pack.get_app(app_name)
+        with self.decoded_lock:
+            self.decoded[app_name] = shortcuts
+            if len(self.decoded) > self.max_apps:
+                self.decoded.popitem(last=False)
+        return shortcuts
+
+    def __setitem__(self, app_name, shortcuts):
+        self.modified[app_name] = shortcuts
+        self.deleted.discard(app_name)
+
+    def __delitem__(self, app_name):
+        if app_name not in self:
+            raise KeyError(app_name)
+        self.modified.pop(app_name, None)
+        if app_name in self.app_counts:
+            self.deleted.add(app_name)
+
+    def __contains__(self, app_name):
+        if app_name in self.modified:
+            return True
+        return app_name in self.app_counts and app_name not in self.deleted
+
+    def __iter__(self):
+        for app_name in self.app_counts:
+            if app_name not in self.deleted and app_name not in self.modified:
+                yield app_name
+        yield from self.modified
+
+    def __len__(self):
+        packed = sum(1 for app_name in self.app_counts
+                     if app_name not in self.deleted and app_name not in self.modified)
+        return packed + len(self.modified)
+
+    def count(self, app_name):
+        """Get the number of shortcuts for an app without decoding it"""
+        if app_name in self.modified:
+            return len(self.modified[app_name])
+        if app_name in self.deleted:
+            return 0
+        return self.app_counts.get(app_name, 0)
+
+    def packed_columns(self):
+        """Get (strings, columns, app ranges) of the apps still served from the pack.
+
+        columns holds one sequence of string ids per field in FIELDS, by
+        record number, with MISSING for absent fields. Nothing is decoded
+        but the string table, so all-app indexes can be built without
+        pulling every app into memory.
+        """
+        records = self.pack.records()
+        width = len(FIELDS)
+        columns = tuple(records[i::width] for i in range(width))
+        app_ranges = {app_name: app_range for app_name, app_range in self.pack.app_index().items()
+                      if app_name not in self.modified and app_name not in self.deleted}
+        return self.pack.strings(), columns, app_ranges
+
+    def close(self):
+        """Release the underlying pack"""
+        with self.decoded_lock:
+            self.decoded.clear()
+        self.pack.close()
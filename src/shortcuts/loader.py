@@ -1,79 +1,193 @@
 import os
 import json
+from collections import namedtuple
+from src.shortcuts.record import db_to_records
+from src.utils.log import get_logger
 
-def load_default_shortcuts():
-    """Load shortcuts from JSON files or use built-in defaults"""
+log = get_logger(__name__)
+
+# Directory holding the bundled shortcut packs
+DEFAULT_DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "default_shortcuts")
+
+# Optional file in a pack directory mapping process names to pack files
+MANIFEST_NAME = "manifest.json"
+
+# Below this many packs a worker pool costs more than it saves
+PARALLEL_MIN_PACKS = 8
+
+# A pack that could not be loaded, and why
+PackError = namedtuple("PackError", ["path", "message"])
+
+def read_manifest(pack_dir, errors):
+    """Get {file name: [process names]} from a pack directory's manifest"""
+    manifest_path = os.path.join(pack_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, 'rb') as f:
+            manifest = json.load(f)
+        if not isinstance(manifest, dict):
+            raise ValueError("expected an object mapping process names to pack files")
+    except (OSError, ValueError) as e:
+        errors.append(PackError(manifest_path, str(e)))
+        return {}
+        
+    packs = {}
+    for process_name, file_name in manifest.items():
+        packs.setdefault(file_name, []).append(process_name)
+    return packs
+
+def discover_packs(pack_dirs, errors):
+    """Find every pack in pack_dirs as {path: [process names from the manifest]}"""
+    packs = {}
+    for pack_dir in pack_dirs:
+        if not os.path.isdir(pack_dir):
+            continue
+        manifest = read_manifest(pack_dir, errors)
+        with os.scandir(pack_dir) as entries:
+            names = sorted(entry.name for entry in entries
+                           if entry.is_file() and entry.name.endswith(".json") and entry.name != MANIFEST_NAME)
+        for file_name in names:
+            packs[os.path.join(pack_dir, file_name)] = manifest.get(file_name, [])
+        for file_name in manifest.keys() - set(names):
+            errors.append(PackError(os.path.join(pack_dir, file_name), "listed in the manifest but missing"))
+    return packs
+
+def pack_shortcuts(pack_data, app_name):
+    """Pick an application's shortcuts out of a parsed pack, or None"""
+    if isinstance(pack_data, list):
+        return pack_data
+    if isinstance(pack_data, dict):
+        if app_name in pack_data:
+            return pack_data[app_name]
+        # A pack for another process name, e.g. a browser sharing Chrome's pack
+        if len(pack_data) == 1:
+            return next(iter(pack_data.values()))
+    return None
+
+def parse_pack(path, app_names):
+    """Parse one pack file into ({app: shortcuts}, error message or None).
+
+    Packs named in the manifest hold shortcuts for the process names it
+    gives; other packs must be objects keyed by process name. Runs in a
+    worker, so it returns errors instead of logging them.
+    """
+    try:
+        with open(path, 'rb') as f:
+            pack_data = json.load(f)
+    except (OSError, ValueError) as e:
+        return {}, str(e)
+        
+    if app_names:
+        apps = {app_name: pack_shortcuts(pack_data, app_name) for app_name in app_names}
+    elif isinstance(pack_data, dict):
+        apps = pack_data
+    else:
+        return {}, "not in the manifest, so it must be an object keyed by process name"
+        
+    for app_name, shortcuts in apps.items():
+        if not isinstance(shortcuts, list):
+            return {}, f"no list of shortcuts for {app_name}"
+    return apps, None
+
+def load_packs(pack_dirs, select=None, executor="auto", max_workers=None):
+    """Load the shortcut packs in pack_dirs, parsing them in parallel.
+
+    select(path) limits loading to some pack files, e.g. the ones that
+    just changed. executor is "serial", "thread", "process" or "auto",
+    which uses processes once there are enough packs and more than one
+    CPU, since parsing JSON holds the GIL. Returns (shortcuts_db, errors);
+    an app in a later pack replaces the same app in an earlier one.
+    """
+    errors = []
+    packs = discover_packs(pack_dirs, errors)
+    if select is not None:
+        packs = {path: names for path, names in packs.items() if select(path)}
+        
+    if executor == "auto":
+        parallel = len(packs) >= PARALLEL_MIN_PACKS and (os.cpu_count() or 1) > 1
+        executor = "process" if parallel else "serial"
+    if executor == "serial" or len(packs) < 2:
+        results = [parse_pack(path, names) for path, names in packs.items()]
+    else:
+        # concurrent.futures is only worth importing once there is a pool to run
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+        pool_class = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+        with pool_class(max_workers=max_workers) as pool:
+            results = list(pool.map(parse_pack, packs.keys(), packs.values(),
+                                    chunksize=max(1, len(packs) // 32)))
+            
+    shortcuts_db = {}
+    for path, (apps, error) in zip(packs, results):
+        if error is not None:
+            errors.append(PackError(path, error))
+            continue
+        shortcuts_db.update(apps)
+        log.debug("Loaded %s: %s", os.path.basename(path), ", ".join(apps))
+    return db_to_records(shortcuts_db), errors
+
+# Shortcuts used for an app when no pack provides it
+BUILTIN_SHORTCUTS = {
+    # VSCode shortcuts (simplified)
+    "Code.exe": [
+        {"description": "Show Command Palette", "keys": "Ctrl+Shift+P", "category": "General", "detail": "Access all commands in VS Code"},
+        {"description": "Quick Open", "keys": "Ctrl+P", "category": "General", "detail": "Search and open files in the current project"},
+        {"description": "New File", "keys": "Ctrl+N", "category": "General", "detail": "Create a new file in the editor"},
+        {"description": "Save", "keys": "Ctrl+S", "category": "General", "detail": "Save the current file"},
+        {"description": "Save As", "keys": "Ctrl+Shift+S", "category": "General", "detail": "Save the current file with a new name"}
+    ],
+    
+    # Chrome shortcuts
+    "chrome.exe": [
+        {"description": "New Tab", "keys": "Ctrl+T", "category": "Tabs", "detail": "Open a new browser tab"},
+        {"description": "Close Tab", "keys": "Ctrl+W", "category": "Tabs", "detail": "Close the current browser tab"},
+        {"description": "Reopen Closed Tab", "keys": "Ctrl+Shift+T", "category": "Tabs", "detail": "Restore the most recently closed tab"}
+    ],
+    
+    # Brave shortcuts
+    "brave.exe": [
+        {"description": "New Tab", "keys": "Ctrl+T", "category": "Tabs", "detail": "Open a new browser tab"},
+        {"description": "Close Tab", "keys": "Ctrl+W", "category": "Tabs", "detail": "Close the current browser tab"},
+        {"description": "Reopen Closed Tab", "keys": "Ctrl+Shift+T", "category": "Tabs", "detail": "Restore the most recently closed tab"}
+    ],
+    
+    # Explorer shortcuts
+    "explorer.exe": [
+        {"description": "New Folder", "keys": "Ctrl+Shift+N", "category": "File Management", "detail": "Create a new folder in the current location"},
+        {"description": "Rename Item", "keys": "F2", "category": "File Management", "detail": "Rename the selected file or folder"}
+    ]
+}
+
+def load_default_shortcuts(data_dir=None, pack_dirs=(), errors=None, executor="auto"):
+    """Load shortcuts from every pack in the data directory and pack_dirs.
+
+    Apps in BUILTIN_SHORTCUTS that no pack provides, say because their pack
+    is missing or broken, get the built-in shortcuts. Packs that can't be
+    loaded are added to errors as PackErrors.
+    """
     
     # Path to the shortcuts data directory
-    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "default_shortcuts")
+    if data_dir is None:
+        data_dir = DEFAULT_DATA_DIR
     
     # Check if the directory exists, create it if it doesn't
     if not os.path.exists(data_dir):
         os.makedirs(data_dir)
     
-    # Dictionary to store all shortcuts
-    shortcuts_db = {}
-    
-    # List of known applications and their JSON files
-    app_files = {
-        "Code.exe": "vscode.json",
-        "chrome.exe": "chrome.json",
-        "explorer.exe": "explorer.json"
-    }
-    
-    # Try to load shortcuts from JSON files
-    for app_name, file_name in app_files.items():
-        file_path = os.path.join(data_dir, file_name)
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    app_data = json.load(f)
-                    # Check if the file contains the right structure
-                    if app_name in app_data:
-                        shortcuts_db[app_name] = app_data[app_name]
-                        print(f"Loaded {len(app_data[app_name])} shortcuts for {app_name}")
-                    else:
-                        # If the JSON doesn't have the app name as a key, assume the whole file is for that app
-                        shortcuts_db[app_name] = app_data
-                        print(f"Loaded {len(app_data)} shortcuts for {app_name}")
-            except Exception as e:
-                print(f"Error loading shortcuts from {file_path}: {e}")
+    shortcuts_db, load_errors = load_packs([data_dir, *pack_dirs], executor=executor)
+    if load_errors:
+        log.warning("%d shortcut packs could not be loaded", len(load_errors))
+        if errors is not None:
+            errors.extend(load_errors)
     
-    # If no shortcuts were loaded from files, use built-in defaults
-    if not shortcuts_db:
-        print("No shortcut files found, using built-in defaults")
-        shortcuts_db = {
-            # VSCode shortcuts (simplified)
-            "Code.exe": [
-                {"description": "Show Command Palette", "keys": "Ctrl+Shift+P", "category": "General", "detail": "Access all commands in VS Code"},
-                {"description": "Quick Open", "keys": "Ctrl+P", "category": "General", "detail": "Search and open files in the current project"},
-                {"description": "New File", "keys": "Ctrl+N", "category": "General", "detail": "Create a new file in the editor"},
-                {"description": "Save", "keys": "Ctrl+S", "category": "General", "detail": "Save the current file"},
-                {"description": "Save As", "keys": "Ctrl+Shift+S", "category": "General", "detail": "Save the current file with a new name"}
-            ],
-            
-            # Chrome shortcuts
-            "chrome.exe": [
-                {"description": "New Tab", "keys": "Ctrl+T", "category": "Tabs", "detail": "Open a new browser tab"},
-                {"description": "Close Tab", "keys": "Ctrl+W", "category": "Tabs", "detail": "Close the current browser tab"},
-                {"description": "Reopen Closed Tab", "keys": "Ctrl+Shift+T", "category": "Tabs", "detail": "Restore the most recently closed tab"}
-            ],
-            
-            # Brave shortcuts
-            "brave.exe": [
-                {"description": "New Tab", "keys": "Ctrl+T", "category": "Tabs", "detail": "Open a new browser tab"},
-                {"description": "Close Tab", "keys": "Ctrl+W", "category": "Tabs", "detail": "Close the current browser tab"},
-                {"description": "Reopen Closed Tab", "keys": "Ctrl+Shift+T", "category": "Tabs", "detail": "Restore the most recently closed tab"}
-            ],
-            
-            # Explorer shortcuts
-            "explorer.exe": [
-                {"description": "New Folder", "keys": "Ctrl+Shift+N", "category": "File Management", "detail": "Create a new folder in the current location"},
-                {"description": "Rename Item", "keys": "F2", "category": "File Management", "detail": "Rename the selected file or folder"}
-            ]
-        }
+    # Fall back to the built-in shortcuts app by app
+    missing = [app_name for app_name in BUILTIN_SHORTCUTS if app_name not in shortcuts_db]
+    if missing:
+        log.info("Using built-in shortcuts for %s", ", ".join(missing))
+        shortcuts_db.update(db_to_records({app_name: BUILTIN_SHORTCUTS[app_name] for app_name in missing}))
     
-    print(f"Loaded shortcuts for {len(shortcuts_db)} applications")
+    log.info("Loaded shortcuts for %d applications", len(shortcuts_db))
     return shortcuts_db
 
 def load_shortcuts_from_file(file_path):
@@ -82,5 +196,5 @@ def load_shortcuts_from_file(file_path):
         with open(file_path, 'r', encoding='utf-8') as f:
             return json.load(f)
     except Exception as e:
-        print(f"Error loading shortcuts from {file_path}: {e}")
+        log.warning("Error loading shortcuts from %s: %s", file_path, e)
         return {}
\ No newline at end of file
@@ -1,37 +1,384 @@
 import os
 import json
-from src.shortcuts.loader import load_default_shortcuts
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+from src.shortcuts.loader import DEFAULT_DATA_DIR, MANIFEST_NAME, load_default_shortcuts, load_packs
+from src.shortcuts.columnar import ColumnarShortcutDB
+from src.shortcuts.fuzzy import DEFAULT_LIMIT, FuzzyIndex
+from src.shortcuts.lazy import LazyShortcutDB
+from src.shortcuts.record import to_records
+from src.shortcuts.search import SearchIndex
+from src.utils.config import apply_shortcut_changes
+from src.utils.log import get_logger
+from src.utils.metrics import latency
+
+log = get_logger(__name__)
+
+# One category of an app's grouped view
+CategoryGroup = namedtuple("CategoryGroup", ["name", "shortcuts", "count"])
+
+# Shortcut files reread after a change: the apps that changed (None if
+# removed), and in lazy mode the database over the rebuilt pack along
+# with the database it was reread against
+Reload = namedtuple("Reload", ["changes", "shortcuts_db", "base"])
+
+
+def group_by_category(shortcuts):
+    """Group shortcuts into an immutable tuple of CategoryGroups, in first-seen order"""
+    categories = {}
+    for shortcut in shortcuts:
+        categories.setdefault(shortcut.get("category", "General"), []).append(shortcut)
+    return tuple(CategoryGroup(name, tuple(items), len(items)) for name, items in categories.items())
+
+
+def diff_shortcuts(old, new, apps=None):
+    """Get {app: new shortcuts} for the apps whose shortcuts differ, None if removed.
+
+    Only apps is compared when given, plus any apps added or removed.
+    """
+    names = set(old) ^ set(new)
+    names.update(set(old) | set(new) if apps is None else apps)
+    return {app: new.get(app) for app in names if old.get(app) != new.get(app)}
+
+
+def copy_db(shortcuts_db):
+    """Get a copy of a shortcuts database that can be changed without affecting the original"""
+    return shortcuts_db.copy() if hasattr(shortcuts_db, "copy") else dict(shortcuts_db)
+
+
+class ShortcutSnapshot:
+    """One published version of the shortcuts database and the data derived from it.
+
+    The database is never changed once published; writers build the next
+    version and swap it in. The derived caches only ever hold data
+    computed from this version's database. They are bounded LRU caches,
+    so readers on any thread fill them in through cached() and store(),
+    which take a short lock.
+    """
+
+    def __init__(self, shortcuts_db, search_indexes=None, grouped_views=None):
+        self.shortcuts_db = shortcuts_db
+        self.search_indexes = OrderedDict() if search_indexes is None else search_indexes
+        self.grouped_views = OrderedDict() if grouped_views is None else grouped_views
+        self.fuzzy_index = None
+        self.cache_lock = threading.Lock()
+
+    def derive(self, shortcuts_db, changed_apps):
+        """Get the next version over shortcuts_db, keeping the derived data of unchanged apps"""
+        with self.cache_lock:
+            return ShortcutSnapshot(
+                shortcuts_db,
+                OrderedDict((app, index) for app, index in self.search_indexes.items()
+                            if app not in changed_apps),
+                OrderedDict((app, view) for app, view in self.grouped_views.items()
+                            if app not in changed_apps),
+            )
+
+    def cached(self, cache, app_name):
+        """Get an app's entry in one of the derived caches, marking it most recently used"""
+        with self.cache_lock:
+            value = cache.get(app_name)
+            if value is not None:
+                cache.move_to_end(app_name)
+            return value
+
+    def store(self, cache, app_name, value, max_apps):
+        """Add an app's entry to one of the derived caches, evicting the least recently used"""
+        with self.cache_lock:
+            cache[app_name] = value
+            cache.move_to_end(app_name)
+            while len(cache) > max_apps:
+                cache.popitem(last=False)
+
 
 class ShortcutManager:
-    def __init__(self, config):
-        print("Initializing ShortcutManager")
+    """Shortcut database shared by the Tk, hotkey, tray and watcher threads.
+
+    Readers take the current ShortcutSnapshot once and work on it without
+    locking. Writers serialize on write_lock, build a new version and
+    publish it with a single assignment, so a lookup never waits on an
+    edit or reload and never sees half of one.
+    """
+
+    def __init__(self, config, lazy=None, columnar=None):
+        log.debug("Initializing ShortcutManager")
         self.config = config
-        self.shortcuts_db = {}
+        # In lazy mode apps are decoded from the compiled pack on first lookup
+        self.lazy = config.get("lazy_loading", False) if lazy is None else lazy
+        # In columnar mode shortcuts live in per-field arrays, for very large databases
+        self.columnar = config.get("columnar_storage", False) if columnar is None else columnar
+        # Grouped views and search indexes are kept for this many apps; in
+        # lazy mode they hold decoded shortcuts, so they follow the app cache
+        self.view_cache_size = (config.get("lazy_cache_size", 8) if self.lazy
+                                else config.get("view_cache_size", 32))
+        self.snapshot = ShortcutSnapshot({})
+        self.write_lock = threading.RLock()
+        self.load_errors = []  # PackErrors from the last pack load
         self.load_shortcuts()
-        print(f"Loaded {len(self.shortcuts_db)} applications with shortcuts")
-        for app in self.shortcuts_db:
-            print(f" - {app}: {len(self.shortcuts_db[app])} shortcuts")
+        log.info("Loaded %d applications with shortcuts", len(self.shortcuts_db))
+        if log.isEnabledFor(logging.DEBUG):
+            for app in self.shortcuts_db:
+                log.debug(" - %s: %d shortcuts", app, self.get_shortcut_count(app))
+        
+    @property
+    def shortcuts_db(self):
+        """The database of the current snapshot; treat it as read-only"""
+        return self.snapshot.shortcuts_db
+
+    @property
+    def search_indexes(self):
+        """Search indexes built over the current snapshot"""
+        return self.snapshot.search_indexes
+
+    @property
+    def grouped_views(self):
+        """Grouped views built over the current snapshot"""
+        return self.snapshot.grouped_views
+
+    def publish(self, shortcuts_db, changed_apps=None):
+        """Swap in a new version of the database; call with write_lock held.
+
+        The derived data of apps not in changed_apps carries over; all of
+        it is dropped when changed_apps is None.
+        """
+        if changed_apps is None:
+            self.snapshot = ShortcutSnapshot(shortcuts_db)
+        else:
+            self.snapshot = self.snapshot.derive(shortcuts_db, changed_apps)
+
+    def update_apps(self, changes):
+        """Publish a new version with {app: shortcuts, or None to remove} applied"""
+        with self.write_lock:
+            shortcuts_db = copy_db(self.snapshot.shortcuts_db)
+            apply_shortcut_changes(shortcuts_db, changes)
+            self.publish(shortcuts_db, changes)
         
     def load_shortcuts(self):
         """Load shortcuts from files"""
+        with self.write_lock:
+            self.publish(self._read_shortcuts())
+            
+    def _read_shortcuts(self):
+        """Build the database from the shortcut files"""
+        if self.columnar:
+            pack = self.config.get_shortcut_pack()
+            if pack is not None:
+                with pack:
+                    shortcuts_db = ColumnarShortcutDB.from_pack(pack)
+                apply_shortcut_changes(shortcuts_db, self.config.get_shortcut_changes())
+                return shortcuts_db
+        elif self.lazy:
+            pack = self.config.get_shortcut_pack()
+            if pack is not None:
+                shortcuts_db = LazyShortcutDB(pack, self.config.get("lazy_cache_size", 8))
+                apply_shortcut_changes(shortcuts_db, self.config.get_shortcut_changes())
+                return shortcuts_db
+                
         # Load from user config
         user_shortcuts = self.config.get_shortcuts()
         if user_shortcuts:
-            self.shortcuts_db.update(user_shortcuts)
-        else:
-            # Load default shortcuts
-            self.shortcuts_db = load_default_shortcuts()
-            self.save_shortcuts()
+            return dict(user_shortcuts)
+        
+        # Load default shortcuts
+        shortcuts_db = load_default_shortcuts(pack_dirs=self.config.get_pack_dirs(),
+                                              errors=self.load_errors,
+                                              executor=self.config.get("pack_executor", "auto"))
+        self.config.save_shortcuts(dict(shortcuts_db))
+        return shortcuts_db
             
     def save_shortcuts(self):
         """Save shortcuts to config"""
-        self.config.save_shortcuts(self.shortcuts_db)
+        self.config.save_shortcuts(dict(self.shortcuts_db))
         
     def get_shortcuts_for_app(self, app_name):
         """Get shortcuts for a specific application"""
         if not app_name:
             return []
             
-        shortcuts = self.shortcuts_db.get(app_name, [])
-        print(f"Found {len(shortcuts)} shortcuts for {app_name}")
-        return shortcuts
\ No newline at end of file
+        with latency.span("get_shortcuts_for_app"):
+            shortcuts = self.snapshot.shortcuts_db.get(app_name, [])
+        log.debug("Found %d shortcuts for %s", len(shortcuts), app_name)
+        return shortcuts
+        
+    def set_shortcuts_for_app(self, app_name, shortcuts):
+        """Replace the shortcuts of an application and save just that change"""
+        shortcuts = to_records(shortcuts)
+        with self.write_lock:
+            self.update_apps({app_name: shortcuts})
+            self.config.save_app_shortcuts(app_name, shortcuts)
+        
+    def remove_app(self, app_name):
+        """Remove an application and its shortcuts"""
+        with self.write_lock:
+            self.update_apps({app_name: None})
+            self.config.save_app_shortcuts(app_name, None)
+        
+    def watched_paths(self):
+        """Get the files and directories whose edits are reloaded while running"""
+        return [self.config.shortcuts_file, self.config.shortcuts_journal,
+                DEFAULT_DATA_DIR, *self.config.get_pack_dirs()]
+        
+    def read_changes(self, paths):
+        """Reread the changed shortcut files among paths.
+
+        Runs on the file watcher's thread; pass the result to apply_reload()
+        on the Tk thread. Only the edited files are parsed. Edits to a
+        shortcut pack are also saved to the user config, since that is
+        what gets loaded at startup.
+        """
+        changes = {}
+        shortcuts_db = None
+        snapshot = self.snapshot
+        
+        user_files = (self.config.shortcuts_file, self.config.shortcuts_journal)
+        if any(path in paths and not self.config.is_own_write(path) for path in user_files):
+            if isinstance(snapshot.shortcuts_db, LazyShortcutDB):
+                pack = self.config.get_shortcut_pack(quarantine=False)
+                if pack is not None:
+                    old = snapshot.shortcuts_db
+                    shortcuts_db = LazyShortcutDB(pack, self.config.get("lazy_cache_size", 8))
+                    apply_shortcut_changes(shortcuts_db, self.config.get_shortcut_changes())
+                    # Apps nobody has looked at yet decode fresh from the new pack
+                    seen = (set(old.decoded) | set(old.modified)
+                            | set(snapshot.grouped_views) | set(snapshot.search_indexes))
+                    changes.update(diff_shortcuts(old, shortcuts_db, seen))
+            else:
+                shortcuts = self.config.get_shortcuts(quarantine=False)
+                if shortcuts is not None:
+                    changes.update(diff_shortcuts(dict(snapshot.shortcuts_db), shortcuts))
+                    
+        pack_dirs = [DEFAULT_DATA_DIR, *self.config.get_pack_dirs()]
+        pack_paths = {path for path in paths if os.path.dirname(path) in pack_dirs}
+        if pack_paths:
+            # A changed manifest can remap every pack in its directory
+            changed_dirs = {os.path.dirname(path) for path in pack_paths
+                            if os.path.basename(path) == MANIFEST_NAME}
+            shortcuts, errors = load_packs(
+                pack_dirs, lambda path: path in pack_paths or os.path.dirname(path) in changed_dirs,
+                executor=self.config.get("pack_executor", "auto"))
+            # Unreadable packs are usually still being written; the next event retries
+            for error in errors:
+                log.debug("Skipping pack %s: %s", error.path, error.message)
+            pack_changes = {}
+            for app_name, app_shortcuts in shortcuts.items():
+                if app_shortcuts != snapshot.shortcuts_db.get(app_name):
+                    pack_changes[app_name] = app_shortcuts
+                    self.config.save_app_shortcuts(app_name, app_shortcuts)
+            # The save is written behind, so a database rebuilt above doesn't have them yet
+            if shortcuts_db is not None:
+                apply_shortcut_changes(shortcuts_db, pack_changes)
+            changes.update(pack_changes)
+                
+        if changes:
+            log.info("Reloading shortcuts for %s", ", ".join(sorted(changes)))
+        return Reload(changes, shortcuts_db, snapshot.shortcuts_db)
+        
+    def apply_reload(self, reload):
+        """Publish reloaded shortcuts, dropping the derived data of the changed apps.
+
+        A replaced database isn't closed here: readers may still hold the
+        snapshot it belongs to, and it is released along with the last one.
+        """
+        with self.write_lock:
+            if reload.shortcuts_db is None:
+                self.update_apps(reload.changes)
+                return set(reload.changes)
+                
+            # Edits published since read_changes() aren't in the rebuilt
+            # database; carry them over so they aren't lost
+            shortcuts_db = reload.shortcuts_db
+            current = self.snapshot.shortcuts_db
+            changes = dict(reload.changes)
+            # Every announced change must be in what gets published
+            apply_shortcut_changes(shortcuts_db, {
+                app: shortcuts for app, shortcuts in changes.items()
+                if shortcuts_db.get(app) != shortcuts})
+            if current is not reload.base:
+                edited = set(current.modified) | current.deleted
+                rebase = diff_shortcuts(reload.base, current, edited)
+                apply_shortcut_changes(shortcuts_db, rebase)
+                changes.update(rebase)
+            self.publish(shortcuts_db, changes)
+        return set(changes)
+        
+    def invalidate_app(self, app_name):
+        """Drop the derived data cached for an application"""
+        with self.write_lock:
+            self.publish(self.snapshot.shortcuts_db, (app_name,))
+        
+    def get_grouped_shortcuts(self, app_name):
+        """Get the shortcuts of an application grouped by category.
+
+        The view is computed once and cached until the app's shortcuts change.
+        """
+        if not app_name:
+            return ()
+            
+        snapshot = self.snapshot
+        view = snapshot.cached(snapshot.grouped_views, app_name)
+        if view is None:
+            # Columnar apps are grouped over the category column
+            groups = None
+            if isinstance(snapshot.shortcuts_db, ColumnarShortcutDB):
+                with latency.span("grouping"):
+                    groups = snapshot.shortcuts_db.group(app_name)
+            if groups is not None:
+                view = tuple(CategoryGroup(name, rows, len(rows)) for name, rows in groups)
+            else:
+                with latency.span("get_shortcuts_for_app"):
+                    shortcuts = snapshot.shortcuts_db.get(app_name, [])
+                with latency.span("grouping"):
+                    view = group_by_category(shortcuts)
+            snapshot.store(snapshot.grouped_views, app_name, view, self.view_cache_size)
+        return view
+        
+    def get_shortcut_count(self, app_name):
+        """Get the number of shortcuts for an application without decoding it"""
+        shortcuts_db = self.snapshot.shortcuts_db
+        if isinstance(shortcuts_db, (LazyShortcutDB, ColumnarShortcutDB)):
+            return shortcuts_db.count(app_name)
+        return len(shortcuts_db.get(app_name, []))
+
+    def get_search_index(self, app_name):
+        """Get the search index for an application, building it on first use"""
+        snapshot = self.snapshot
+        index = snapshot.cached(snapshot.search_indexes, app_name)
+        if index is None and isinstance(snapshot.shortcuts_db, ColumnarShortcutDB):
+            index = snapshot.shortcuts_db.search_index(app_name)
+        if index is None:
+            index = SearchIndex(snapshot.shortcuts_db.get(app_name, []))
+            snapshot.store(snapshot.search_indexes, app_name, index, self.view_cache_size)
+        return index
+
+    def search(self, app_name, query):
+        """Search the shortcuts of an application"""
+        if not app_name:
+            return []
+
+        return self.get_search_index(app_name).search(query)
+
+    def get_fuzzy_index(self):
+        """Get the trigram index over every app, building it on first use"""
+        snapshot = self.snapshot
+        if snapshot.fuzzy_index is None:
+            snapshot.fuzzy_index = FuzzyIndex(snapshot.shortcuts_db)
+        return snapshot.fuzzy_index
+
+    def search_all(self, query, limit=DEFAULT_LIMIT):
+        """Get the best FuzzyMatches for query across every application.
+
+        Tolerates typos and ranks chord matches, then descriptions, then details.
+        """
+        if not query.strip():
+            return []
+
+        return self.get_fuzzy_index().search(query, limit)
+
+    def lookup_keys(self, keys):
+        """Get the (app, shortcut) pairs bound to a key string such as "Ctrl+K" in any app.
+
+        Uses the chord tier of the fuzzy index, so the keys of every app are
+        only parsed once per database version.
+        """
+        return self.get_fuzzy_index().lookup_keys(keys)
@@ -0,0 +1,273 @@
+"""Compiled binary shortcut packs.
+
+A pack is a read-only, memory-mapped copy of a shortcuts JSON file:
+
+    header    magic, version, counts, source mtime/size/SHA-1
+    strings   (n_strings + 1) uint32 character offsets into the text blob
+    apps      n_apps x (name string id, first record, record count) uint32
+    records   n_records x one uint32 string id per field (MISSING if absent)
+    blob      every distinct string, UTF-8 encoded back to back
+
+Each distinct string is stored once, so repeated categories and keys
+decode to a single shared object. The pack remembers the mtime, size and
+hash of the JSON file it was compiled from and is ignored once that file
+changes, so the JSON file stays the source of truth.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from src.shortcuts.record import FIELDS, Shortcut
+
+PACK_MAGIC = b"SHPK"
+PACK_VERSION = 1
+HEADER = struct.Struct("<4sHHIIIqq20s")
+MISSING = 0xFFFFFFFF
+
+
+def source_signature(data):
+    """Get the SHA-1 digest of the raw bytes of a source file"""
+    return hashlib.sha1(data).digest()
+
+
+def _uint32_bytes(values):
+    """Pack a sequence of ints as little-endian uint32 bytes"""
+    packed = array("I", values)
+    if sys.byteorder != "little":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def write_pack(shortcuts_db, pack_path, source_stat, source_hash):
+    """Compile shortcuts_db into a pack file.
+
+    source_stat and source_hash describe the source file as it was when
+    shortcuts_db was read from it; take the stat from the same open file
+    as the bytes that were hashed, so a later edit can't pair a new mtime
+    with the old contents.
+
+    Raises ValueError if the data has fields or values a pack can't hold;
+    callers should keep using the JSON file in that case.
+    """
+    strings = {}
+
+    def intern(value):
+        if not isinstance(value, str):
+            raise ValueError(f"Cannot pack non-string value {value!r}")
+        string_id = strings.get(value)
+        if string_id is None:
+            string_id = strings[value] = len(strings)
+        return string_id
+
+    apps = []
+    records = []
+    for app_name, shortcuts in shortcuts_db.items():
+        if not isinstance(shortcuts, list):
+            raise ValueError(f"Shortcuts for {app_name} are not a list")
+        apps.extend((intern(app_name), len(records) // len(FIELDS), len(shortcuts)))
+        for shortcut in shortcuts:
+            if isinstance(shortcut, dict) and not set(shortcut) - set(FIELDS):
+                shortcut = [shortcut.get(field) for field in FIELDS]
+            elif not isinstance(shortcut, Shortcut):
+                raise ValueError(f"Cannot pack shortcut {shortcut!r}")
+            records.extend(MISSING if value is None else intern(value) for value in shortcut)
+
+    offsets = [0]
+    for value in strings:
+        offsets.append(offsets[-1] + len(value))
+
+    header = HEADER.pack(
+        PACK_MAGIC, PACK_VERSION, 0,
+        len(strings), len(apps) // 3, len(records) // len(FIELDS),
+        source_stat.st_mtime_ns, source_stat.st_size, source_hash
+    )
+
+    # Write to a temporary file and swap it in so readers never see half a
+    # pack; each writer gets its own, as several threads may compile at once
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(pack_path)),
+                                    prefix=os.path.basename(pack_path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(_uint32_bytes(offsets))
+            f.write(_uint32_bytes(apps))
+            f.write(_uint32_bytes(records))
+            f.write("".join(strings).encode("utf-8"))
+        os.replace(tmp_path, pack_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+class PackReader:
+    """Read-only view of a memory-mapped pack file"""
+
+    def __init__(self, pack_path):
+        with open(pack_path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        self._offsets = self._apps = self._records = None
+
+        try:
+            (magic, version, _, self.n_strings, self.n_apps, self.n_records,
+             self.source_mtime_ns, self.source_size, self.source_hash) = HEADER.unpack_from(self._view)
+            if magic != PACK_MAGIC or version != PACK_VERSION:
+                raise ValueError(f"{pack_path} is not a version {PACK_VERSION} shortcut pack")
+
+            offset = HEADER.size
+            self._offsets = self._uint32_view(offset, self.n_strings + 1)
+            offset += 4 * (self.n_strings + 1)
+            self._apps = self._uint32_view(offset, 3 * self.n_apps)
+            offset += 12 * self.n_apps
+            self._records = self._uint32_view(offset, len(FIELDS) * self.n_records)
+            offset += 4 * len(FIELDS) * self.n_records
+            self._blob_offset = offset
+        except (ValueError, TypeError, struct.error):
+            self.close()
+            raise
+
+        self._text = None
+        self._strings = [None] * self.n_strings
+        self._strings_complete = False
+        self._app_index = None
+
+    def _uint32_view(self, offset, count):
+        """Get count uint32 values starting at offset"""
+        view = self._view[offset:offset + 4 * count]
+        if len(view) != 4 * count:
+            raise ValueError("Truncated shortcut pack")
+        if sys.byteorder == "little":
+            return view.cast("I")
+        values = array("I")
+        values.frombytes(view)
+        values.byteswap()
+        return values
+
+    def close(self):
+        """Release the memory map"""
+        for view in (self._offsets, self._apps, self._records):
+            if isinstance(view, memoryview):
+                view.release()
+        self._offsets = self._apps = self._records = None
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def matches_source(self, source_path):
+        """Check whether the pack was compiled from the current source file"""
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            return False
+
+        if stat.st_mtime_ns == self.source_mtime_ns and stat.st_size == self.source_size:
+            return True
+        if stat.st_size != self.source_size:
+            return False
+
+        # The file was touched; only its contents matter
+        with open(source_path, "rb") as f:
+            return source_signature(f.read()) == self.source_hash
+
+    def string(self, string_id):
+        """Get a string from the string table"""
+        value = self._strings[string_id]
+        if value is None:
+            offsets = self._offsets
+            value = self._get_text()[offsets[string_id]:offsets[string_id + 1]]
+            self._strings[string_id] = value
+        return value
+
+    def _get_text(self):
+        """Decode the string blob on first use"""
+        if self._text is None:
+            self._text = str(self._view[self._blob_offset:], "utf-8")
+        return self._text
+
+    def strings(self):
+        """Get the whole string table as a list indexed by string id, decoded in one pass.
+
+        The list is shared with the reader's cache; don't modify it.
+        """
+        if not self._strings_complete:
+            text = self._get_text()
+            offsets = self._offsets.tolist()
+            self._strings = [text[start:end] for start, end in zip(offsets, offsets[1:])]
+            self._strings_complete = True
+        return self._strings
+
+    def records(self):
+        """Get the record table: len(FIELDS) string ids per record, MISSING for absent fields.
+
+        On little-endian machines this is a view of the memory map, so copy
+        what you need before closing the reader.
+        """
+        return self._records
+
+    def app_index(self):
+        """Get a dict of app name to (first record, record count)"""
+        if self._app_index is None:
+            apps = self._apps
+            self._app_index = {
+                self.string(apps[i]): (apps[i + 1], apps[i + 2])
+                for i in range(0, len(apps), 3)
+            }
+        return self._app_index
+
+    def get_app(self, app_name):
+        """Decode the shortcuts of one application as Shortcut records, or None if it isn't in the pack"""
+        entry = self.app_index().get(app_name)
+        if entry is None:
+            return None
+
+        first, count = entry
+        width = len(FIELDS)
+        records = self._records[first * width:(first + count) * width].tolist()
+
+        strings = self._strings
+        for string_id in set(records):
+            if string_id != MISSING and strings[string_id] is None:
+                self.string(string_id)
+
+        # Records are built with tuple.__new__ directly; it is as fast as a dict literal
+        new = tuple.__new__
+        if MISSING in records:
+            return [
+                new(Shortcut, [None if string_id == MISSING else strings[string_id]
+                               for string_id in records[i:i + width]])
+                for i in range(0, len(records), width)
+            ]
+
+        ids = iter(records)
+        return [new(Shortcut, (strings[d], strings[k], strings[c], strings[t]))
+                for d, k, c, t in zip(ids, ids, ids, ids)]
+
+    def to_dict(self):
+        """Decode the whole pack into a shortcuts_db dict"""
+        self.strings()
+        return {app_name: self.get_app(app_name) for app_name in self.app_index()}
+
+
+def open_pack(pack_path, source_path):
+    """Open the pack for source_path, or return None if it is missing, stale or corrupt"""
+    if not os.path.exists(pack_path):
+        return None
+
+    try:
+        reader = PackReader(pack_path)
+    except (OSError, ValueError, TypeError, struct.error):
+        return None
+
+    if not reader.matches_source(source_path):
+        reader.close()
+        return None
+    return reader
@@ -0,0 +1,91 @@
+"""Compact in-memory shortcut records.
+
+Shortcuts are kept as Shortcut tuples rather than dicts: a four-field
+tuple is well under half the size of the equivalent dict, and a
+StringPool shares the category, keys and detail strings that repeat
+across thousands of shortcuts. JSON on disk keeps the dict layout.
+"""
+from collections import namedtuple
+
+FIELDS = ("description", "keys", "category", "detail")
+_FIELD_INDEX = {field: i for i, field in enumerate(FIELDS)}
+
+
+class Shortcut(namedtuple("Shortcut", FIELDS)):
+    """One keyboard shortcut.
+
+    Reads like the dict it replaces: shortcut["keys"], shortcut.get("detail", "")
+    and "detail" in shortcut all work. Fields absent from the source are None.
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            index = _FIELD_INDEX.get(key)
+            value = None if index is None else tuple.__getitem__(self, index)
+            if value is None:
+                raise KeyError(key)
+            return value
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        """Get a field like dict.get"""
+        index = _FIELD_INDEX.get(key)
+        value = None if index is None else tuple.__getitem__(self, index)
+        return default if value is None else value
+
+    def __contains__(self, key):
+        index = _FIELD_INDEX.get(key)
+        return index is not None and tuple.__getitem__(self, index) is not None
+
+    def to_dict(self):
+        """Get the dict form used in JSON files"""
+        return {field: value for field, value in zip(FIELDS, self) if value is not None}
+
+    @classmethod
+    def from_dict(cls, data, pool=None):
+        """Build a record from a shortcut dict, sharing strings through pool"""
+        intern = pool.intern if pool is not None else _identity
+        get = data.get
+        return tuple.__new__(cls, (
+            intern(get("description")), intern(get("keys")),
+            intern(get("category")), intern(get("detail")),
+        ))
+
+
+def _identity(value):
+    return value
+
+
+class StringPool:
+    """Deduplicates equal strings within one load.
+
+    Unlike sys.intern the table goes away with the pool, so strings from
+    a database that was reloaded can be freed.
+    """
+
+    def __init__(self):
+        self.strings = {}
+
+    def intern(self, value):
+        """Get the pooled copy of a string"""
+        if value is None:
+            return None
+        return self.strings.setdefault(value, value)
+
+
+def to_records(shortcuts, pool=None):
+    """Convert a list of shortcut dicts to Shortcut records"""
+    from_dict = Shortcut.from_dict
+    return [s if isinstance(s, Shortcut) else from_dict(s, pool) for s in shortcuts]
+
+
+def db_to_records(shortcuts_db):
+    """Convert {app: [shortcut dicts]} to Shortcut records, pooling strings across all apps"""
+    pool = StringPool()
+    return {app_name: to_records(shortcuts, pool) for app_name, shortcuts in shortcuts_db.items()}
+
+
+def to_dicts(shortcuts):
+    """Convert shortcuts back to dicts for JSON"""
+    return [s.to_dict() if isinstance(s, Shortcut) else s for s in shortcuts]
@@ -0,0 +1,131 @@
+import re
+from bisect import bisect_left
+
+# Fields of a shortcut entry that are searchable
+SEARCH_FIELDS = ("description", "keys", "category", "detail")
+
+# Alphanumeric runs, or single symbol characters such as "/" or "`".
+# "+" is left out because it only joins modifiers in key strings.
+TOKEN_RE = re.compile(r"[^\W_]+|[^\w\s+]")
+
+# Query tokens up to this long are answered from precomputed prefix
+# buckets, so the first keystrokes never scan the vocabulary
+BUCKET_PREFIX_LEN = 2
+
+# Result sets up to this size are narrowed by checking each entry;
+# larger ones are intersected with an index lookup instead
+NARROW_LIMIT = 256
+
+
+def tokenize(text):
+    """Split text into lowercase search tokens"""
+    return TOKEN_RE.findall(text.lower())
+
+
+class SearchIndex:
+    """Inverted token index over the shortcuts of a single application.
+
+    Every query token is matched as a prefix of the entry tokens, and all
+    query tokens must match. When a query only extends the previous one
+    (the user typed another character), the previous result set is
+    narrowed instead of going back to the index, as long as it is small.
+    """
+
+    def __init__(self, shortcuts):
+        self.shortcuts = shortcuts
+        self.postings = {}
+        self.entry_tokens = []
+
+        for entry_id, shortcut in enumerate(shortcuts):
+            tokens = set()
+            for field in SEARCH_FIELDS:
+                value = shortcut.get(field)
+                if value:
+                    tokens.update(tokenize(value))
+            for token in tokens:
+                self.postings.setdefault(token, []).append(entry_id)
+            self.entry_tokens.append(tuple(tokens))
+
+        # Sorted vocabulary for prefix range lookups
+        self.vocabulary = sorted(self.postings)
+        # Ids of the entries under each short prefix; shared with callers, so frozen
+        buckets = {}
+        for token, ids in self.postings.items():
+            for length in range(1, min(len(token), BUCKET_PREFIX_LEN) + 1):
+                buckets.setdefault(token[:length], set()).update(ids)
+        self.buckets = {prefix: frozenset(ids) for prefix, ids in buckets.items()}
+
+        # (query, tokens, ids) of the previous query, used for incremental
+        # narrowing. Read and replaced in one step, so searches on several
+        # threads can't narrow from a mix of two queries.
+        self._last = None
+
+    def __len__(self):
+        return len(self.shortcuts)
+
+    def _prefix_ids(self, prefix):
+        """Get the ids of all entries with a token starting with prefix"""
+        if len(prefix) <= BUCKET_PREFIX_LEN:
+            return self.buckets.get(prefix, frozenset())
+        start = bisect_left(self.vocabulary, prefix)
+        ids = set()
+        for token in self.vocabulary[start:]:
+            if not token.startswith(prefix):
+                break
+            ids.update(self.postings[token])
+        return ids
+
+    def _bucket_size(self, token):
+        """Get the number of entries under the short prefix of token, at least its match count"""
+        return len(self.buckets.get(token[:BUCKET_PREFIX_LEN], ()))
+
+    def _lookup(self, tokens):
+        """Resolve tokens against the index, rarest first by prefix bucket size"""
+        ids = None
+        for token in sorted(set(tokens), key=self._bucket_size):
+            if ids is None:
+                ids = self._prefix_ids(token)
+            elif len(ids) <= NARROW_LIMIT:
+                ids = self._narrow(ids, [token])
+            else:
+                ids = ids & self._prefix_ids(token)
+            if not ids:
+                break
+        return ids or set()
+
+    def _narrow(self, ids, tokens):
+        """Keep only the entries in ids that match every token"""
+        entry_tokens = self.entry_tokens
+        return {
+            entry_id for entry_id in ids
+            if all(any(t.startswith(token) for t in entry_tokens[entry_id]) for token in tokens)
+        }
+
+    def search_ids(self, query):
+        """Get the sorted ids of the entries matching query"""
+        tokens = tokenize(query)
+        if not tokens:
+            self._last = None
+            return list(range(len(self.shortcuts)))
+
+        last = self._last
+        if last is not None and query.startswith(last[0]):
+            # Typing more can only add or lengthen tokens, so the new result
+            # set is a subset of the previous one
+            _, last_tokens, previous = last
+            new_tokens = [t for t in tokens if t not in last_tokens]
+            if not new_tokens:
+                ids = previous
+            elif len(previous) <= NARROW_LIMIT:
+                ids = self._narrow(previous, new_tokens)
+            else:
+                ids = previous & self._lookup(new_tokens)
+        else:
+            ids = self._lookup(tokens)
+
+        self._last = (query, frozenset(tokens), ids)
+        return sorted(ids)
+
+    def search(self, query):
+        """Get the shortcuts matching query, in their original order"""
+        return [self.shortcuts[entry_id] for entry_id in self.search_ids(query)]
@@ -0,0 +1,213 @@
+"""Shortcut file watching.
+
+A FileWatcher reports which of the watched files changed, so shortcut
+files edited while the app runs can be reloaded without a restart.
+Backends watch whole directories, because editors and atomic writers
+replace files rather than writing them in place.
+"""
+import os
+import select
+import struct
+import sys
+import threading
+
+from src.utils.log import get_logger
+
+log = get_logger(__name__)
+
+
+class WatcherBackend:
+    """Source of file change events.
+
+    Backends call on_change(paths) from their own thread with the set of
+    paths in the watched directories that were created, modified,
+    replaced or removed.
+    """
+
+    def start(self, directories, on_change):
+        """Start delivering events for files in directories to on_change"""
+        raise NotImplementedError
+
+    def stop(self):
+        """Stop delivering events"""
+        raise NotImplementedError
+
+
+class PollingBackend(WatcherBackend):
+    """Portable backend that compares mtime and size every interval seconds"""
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, directories, on_change):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(list(directories), on_change),
+                                        name="PollingWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self, directories):
+        """Get {path: (mtime, size)} for the files in directories"""
+        state = {}
+        for directory in directories:
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            st = entry.stat()
+                            state[entry.path] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                continue
+        return state
+
+    def _run(self, directories, on_change):
+        state = self.snapshot(directories)
+        while not self._stop.wait(self.interval):
+            new_state = self.snapshot(directories)
+            changed = {path for path in state.keys() | new_state.keys()
+                       if state.get(path) != new_state.get(path)}
+            state = new_state
+            if changed:
+                on_change(changed)
+
+
+class InotifyBackend(WatcherBackend):
+    """Linux backend using inotify.
+
+    Events arriving within settle seconds of each other are delivered as
+    one batch, so a save that touches a file several times is reported once.
+    """
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    EVENT = struct.Struct("iIII")  # wd, mask, cookie, name length
+
+    def __init__(self, settle=0.2):
+        import ctypes
+        import ctypes.util
+        self.settle = settle
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def available(cls):
+        """Check whether the C library provides inotify"""
+        if not sys.platform.startswith("linux"):
+            return False
+        import ctypes
+        import ctypes.util
+        try:
+            return hasattr(ctypes.CDLL(ctypes.util.find_library("c")), "inotify_init1")
+        except OSError:
+            return False
+
+    def start(self, directories, on_change):
+        import ctypes
+        fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        watches = {}
+        for directory in directories:
+            wd = self.libc.inotify_add_watch(fd, os.fsencode(directory), self.WATCH_MASK)
+            if wd < 0:
+                log.warning("Could not watch %s: %s", directory, os.strerror(ctypes.get_errno()))
+                continue
+            watches[wd] = directory
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(fd, watches, on_change),
+                                        name="InotifyWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _read_events(self, fd, watches, changed):
+        """Add the paths of all queued events to changed"""
+        while True:
+            try:
+                data = os.read(fd, 65536)
+            except BlockingIOError:
+                return
+            offset = 0
+            while offset < len(data):
+                wd, mask, cookie, length = self.EVENT.unpack_from(data, offset)
+                offset += self.EVENT.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if name and wd in watches:
+                    changed.add(os.path.join(watches[wd], os.fsdecode(name)))
+
+    def _run(self, fd, watches, on_change):
+        try:
+            while not self._stop.is_set():
+                # Wake up now and then to notice stop()
+                if not select.select([fd], [], [], 0.5)[0]:
+                    continue
+
+                changed = set()
+                self._read_events(fd, watches, changed)
+                while select.select([fd], [], [], self.settle)[0]:
+                    self._read_events(fd, watches, changed)
+                if changed:
+                    on_change(changed)
+        finally:
+            os.close(fd)
+
+
+def create_backend():
+    """Get inotify where the platform has it, polling elsewhere"""
+    if InotifyBackend.available():
+        return InotifyBackend()
+    return PollingBackend()
+
+
+class FileWatcher:
+    """Reports changes to a set of watched files and directories.
+
+    A watched directory reports every file in it; a watched file only
+    reports itself, though its whole directory is watched underneath.
+    """
+
+    def __init__(self, backend, paths):
+        self.backend = backend
+        self.paths = {os.path.abspath(path) for path in paths}
+        self.listeners = []
+
+    def add_listener(self, callback):
+        """Call callback(paths) on the backend's thread with each batch of changed paths"""
+        self.listeners.append(callback)
+
+    def start(self):
+        """Start watching the paths that exist"""
+        directories = {path if os.path.isdir(path) else os.path.dirname(path) for path in self.paths}
+        self.backend.start(sorted(d for d in directories if os.path.isdir(d)), self.on_change)
+
+    def stop(self):
+        """Stop watching"""
+        self.backend.stop()
+
+    def on_change(self, paths):
+        """Backend callback"""
+        changed = frozenset(path for path in paths
+                            if path in self.paths or os.path.dirname(path) in self.paths)
+        if not changed:
+            return
+        log.debug("Changed files: %s", sorted(changed))
+        for callback in self.listeners:
+            try:
+                callback(changed)
+            except Exception:
+                log.exception("File change listener failed")
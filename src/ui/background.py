@@ -0,0 +1,157 @@
+import queue
+import threading
+
+from src.utils.log import get_logger
+
+log = get_logger(__name__)
+
+# Milliseconds between checks for a finished background load
+POLL_INTERVAL = 20
+# Milliseconds typing must pause before a search runs
+SEARCH_DELAY = 100
+
+
+class BackgroundLoader:
+    """Runs a slow load on a worker thread while the Tk window stays usable.
+
+    Callbacks passed to when_ready() before the result is in are queued
+    and run in order on the Tk thread once it arrives; after that they run
+    straight away. The worker never touches Tk: the Tk thread polls for
+    the result with root.after, which also works before mainloop starts.
+    """
+
+    def __init__(self, root, load, name="BackgroundLoader"):
+        self.root = root
+        self.load = load
+        self.name = name
+        self.ready = False
+        self.result = None
+        self.error = None
+        self.waiting = []  # (callback, on_error) queued until the result is in
+        self.lock = threading.Lock()
+        self._done = threading.Event()
+
+    def start(self):
+        """Start loading; call on the Tk thread"""
+        threading.Thread(target=self._run, name=self.name, daemon=True).start()
+        self.root.after(POLL_INTERVAL, self._poll)
+
+    def when_ready(self, callback, on_error=None):
+        """Call callback(result) once loaded, or on_error(exception) if loading failed"""
+        with self.lock:
+            if not self.ready:
+                self.waiting.append((callback, on_error))
+                return
+        self._call(callback, on_error)
+
+    def _run(self):
+        try:
+            self.result = self.load()
+        except Exception as e:
+            log.exception("%s failed", self.name)
+            self.error = e
+        self._done.set()
+
+    def _poll(self):
+        if not self._done.is_set():
+            self.root.after(POLL_INTERVAL, self._poll)
+            return
+        with self.lock:
+            self.ready = True
+            waiting, self.waiting = self.waiting, []
+        for callback, on_error in waiting:
+            self._call(callback, on_error)
+
+    def _call(self, callback, on_error):
+        try:
+            if self.error is None:
+                callback(self.result)
+            elif on_error is not None:
+                on_error(self.error)
+        except Exception:
+            log.exception("%s callback failed", self.name)
+
+
+class BackgroundSearch:
+    """Debounced searches run on a worker thread and applied on the Tk thread.
+
+    Every submit() takes a new generation id and supersedes the searches
+    before it: one still waiting out the typing pause is cancelled, one
+    queued for the worker is skipped, and a result that finishes late is
+    dropped instead of overwriting a newer one. Like BackgroundLoader, the
+    worker never touches Tk: it queues results, and the Tk thread polls
+    for them with root.after while a search is in flight.
+    """
+
+    def __init__(self, root, delay=SEARCH_DELAY, name="BackgroundSearch"):
+        self.root = root
+        self.delay = delay
+        self.name = name
+        self.generation = 0
+        self._timer = None
+        self._job = None  # (generation, search, on_result) waiting for the worker
+        self._condition = threading.Condition()
+        self._thread = None
+        self._results = queue.SimpleQueue()  # (generation, result, on_result or None if it failed)
+        self._awaiting = None  # generation the Tk thread is polling for
+
+    def submit(self, search, on_result):
+        """Run search() off the Tk thread once typing pauses, then on_result(result) on it.
+
+        Call on the Tk thread. Returns the generation id of the search.
+        """
+        self.cancel()
+        generation = self.generation
+        self._timer = self.root.after(self.delay, lambda: self._dispatch(generation, search, on_result))
+        return generation
+
+    def cancel(self):
+        """Drop every search submitted so far"""
+        self.generation += 1
+        if self._timer is not None:
+            self.root.after_cancel(self._timer)
+            self._timer = None
+
+    def _dispatch(self, generation, search, on_result):
+        self._timer = None
+        with self._condition:
+            self._job = (generation, search, on_result)
+            self._condition.notify()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        if self._awaiting is None:
+            self.root.after(POLL_INTERVAL, self._poll)
+        self._awaiting = generation
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._job is None:
+                    self._condition.wait()
+                generation, search, on_result = self._job
+                self._job = None
+            # Superseded while waiting for the previous search to finish
+            if generation != self.generation:
+                continue
+            try:
+                self._results.put((generation, search(), on_result))
+            except Exception:
+                log.exception("%s failed", self.name)
+                self._results.put((generation, None, None))
+
+    def _poll(self):
+        while True:
+            try:
+                generation, result, on_result = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if generation == self._awaiting:
+                self._awaiting = None
+            if generation == self.generation and on_result is not None:
+                on_result(result)
+        # Keep polling until the latest search is in, unless it was cancelled
+        if self._awaiting is not None and self._awaiting == self.generation:
+            self.root.after(POLL_INTERVAL, self._poll)
+        else:
+            self._awaiting = None
@@ -0,0 +1,122 @@
+import queue
+import threading
+import time
+
+from src.utils.log import get_logger
+from src.utils.metrics import latency
+
+log = get_logger(__name__)
+
+# Milliseconds between drains of the event queue, about one frame
+DISPATCH_INTERVAL = 16
+# Milliseconds within which repeats of a coalesced event are dropped; just
+# over the 500 ms Windows waits by default before a held key starts repeating
+COALESCE_WINDOW = 550
+
+
+class EventDispatcher:
+    """Hands events from the hotkey, tray, detector and watcher threads to Tk.
+
+    Tk must only be touched from the thread running mainloop. Any thread
+    may post() an event; they all go through one queue, which the Tk
+    thread drains every DISPATCH_INTERVAL ms with root.after and runs the
+    callbacks in the order they were posted.
+
+    Events posted with a coalesce key are dropped while the previous
+    event with that key came in less than the coalesce window earlier, so
+    holding the hotkey down toggles the overlay once instead of once per
+    key repeat. Dispatch latency, from post() to the callback starting, is
+    recorded in the shared latency recorder as the "dispatch" stage.
+    """
+
+    def __init__(self, root, interval=DISPATCH_INTERVAL, coalesce_window=COALESCE_WINDOW,
+                 recorder=latency, name="EventDispatcher"):
+        self.root = root
+        self.interval = interval
+        self.coalesce_window = coalesce_window / 1000
+        self.recorder = recorder
+        self.name = name
+        self.queue = queue.SimpleQueue()  # (post time, callback, args)
+        self.last_posted = {}  # coalesce key -> time the last event with it came in
+        self.lock = threading.Lock()
+        self.posted = 0
+        self.coalesced = 0
+        self.dispatched = 0
+        self.max_depth = 0
+        self.running = False
+        self._timer = None
+
+    def start(self):
+        """Start draining the queue; call on the Tk thread"""
+        if not self.running:
+            self.running = True
+            self._timer = self.root.after(self.interval, self._drain)
+
+    def stop(self):
+        """Stop draining; events still queued are dropped"""
+        self.running = False
+        if self._timer is not None:
+            self.root.after_cancel(self._timer)
+            self._timer = None
+
+    def post(self, callback, *args, coalesce=None):
+        """Queue callback(*args) to run on the Tk thread; safe from any thread.
+
+        Returns False if the event was coalesced into an earlier one.
+        """
+        now = time.perf_counter()
+        with self.lock:
+            if coalesce is not None:
+                last = self.last_posted.get(coalesce)
+                self.last_posted[coalesce] = now
+                if last is not None and now - last < self.coalesce_window:
+                    self.coalesced += 1
+                    return False
+            self.posted += 1
+            self.queue.put((now, callback, args))
+            self.max_depth = max(self.max_depth, self.queue.qsize())
+        return True
+
+    def wrap(self, callback, coalesce=None):
+        """Get a function that posts callback with whatever arguments it is called with.
+
+        For handing to libraries that call back on their own threads, like
+        keyboard.add_hotkey, pystray menu items or detector listeners.
+        """
+        return lambda *args: self.post(callback, *args, coalesce=coalesce)
+
+    def depth(self):
+        """Get the number of events waiting for the Tk thread"""
+        return self.queue.qsize()
+
+    def stats(self):
+        """Get the event counts and the deepest the queue has been"""
+        with self.lock:
+            return {
+                "posted": self.posted,
+                "coalesced": self.coalesced,
+                "dispatched": self.dispatched,
+                "depth": self.queue.qsize(),
+                "max_depth": self.max_depth,
+            }
+
+    def format_stats(self):
+        """Format the stats as one line of text"""
+        return ("Events: {posted} posted, {coalesced} coalesced, {dispatched} dispatched; "
+                "queue depth {depth} (max {max_depth})".format(**self.stats()))
+
+    def _drain(self):
+        self._timer = None
+        # Events posted by the callbacks below wait for the next drain
+        for _ in range(self.queue.qsize()):
+            posted_at, callback, args = self.queue.get_nowait()
+            if self.recorder.enabled:
+                self.recorder.record("dispatch", (time.perf_counter() - posted_at) * 1000)
+            with self.lock:
+                self.dispatched += 1
+            try:
+                callback(*args)
+            except Exception:
+                log.exception("%s callback failed", self.name)
+        if self.running:
+            self._timer = self.root.after(self.interval, self._drain)
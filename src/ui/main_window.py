@@ -1,44 +1,106 @@
+import logging
 import tkinter as tk
-import keyboard
-import win32gui
-import win32process
-import psutil
+from collections import OrderedDict
 from tkinter import ttk
+from src.shortcuts.detector import ForegroundDetector, create_backend
+from src.shortcuts.watcher import FileWatcher, create_backend as create_watcher_backend
+from src.ui.dispatcher import EventDispatcher
 from src.ui.styles import apply_theme
+from src.utils.log import get_logger
+from src.utils.metrics import latency
+from src.utils.system import get_process_name
+
+log = get_logger(__name__)
+
+# Number of apps whose rendered tree items are kept detached for reuse
+TREE_CACHE_SIZE = 4
+# Milliseconds focus must rest on an app before its overlay is pre-rendered
+PRERENDER_DELAY = 150
 
 class MainWindow:
-    def __init__(self, root, shortcut_manager, config):
+    def __init__(self, root, shortcut_manager, config, loader=None):
         self.root = root
+        # None until the loader delivers it; lookups wait on the loader meanwhile
         self.shortcuts = shortcut_manager
         self.config = config
+        self.loader = loader
+        # Hotkey, detector and watcher callbacks reach Tk through this queue
+        self.dispatcher = EventDispatcher(root, name="Events")
+        # App name -> (grouped view, top-level item ids), least recently shown first
+        self.tree_cache = OrderedDict()
+        self.detector = None
+        self.watcher = None
+        # Bumped on every focus change; stale pre-renders check it and give up
+        self.focus_generation = 0
+        # (app, grouped view) currently attached to the tree
+        self.rendered = None
+        # Placeholder item shown while the shortcuts load
+        self.loading_item = None
         
     def setup(self):
-        print("Setting up main window...")
         """Set up the main window"""
+        log.debug("Setting up main window")
         # Apply theme
         apply_theme(self.root, self.config.get_theme())
         
+        # Per-stage hotkey timings are opt-in
+        if self.config.get("instrumentation"):
+            latency.enabled = True
+        
         # Window properties
         self.root.title("Keyboard Shortcuts")
         # ... rest of window setup
         
+        self.dispatcher.start()
+        
         # Create UI components
         self.create_search_bar()
         self.create_shortcut_tree()
         # ... other UI components
 
+        # Track the foreground app so the hotkey doesn't have to look it up
+        backend = create_backend()
+        if backend is not None:
+            self.detector = ForegroundDetector(backend)
+            self.detector.add_listener(self.dispatcher.wrap(self.on_focus_change))
+            self.detector.start()
+            
         # Register hotkey
-        keyboard.add_hotkey('ctrl+shift+space', self.toggle_overlay)
+        import keyboard
+        keyboard.add_hotkey('ctrl+shift+space', self.dispatcher.wrap(self.toggle_overlay, coalesce="toggle"))
+        
+        if self.shortcuts is None:
+            # The window works while the shortcuts load; lookups queue on the loader
+            self.loading_item = self.tree.insert("", "end", text="Loading shortcuts...", values=("", ""))
+            self.loader.when_ready(self.on_shortcuts_loaded, self.on_load_failed)
+        else:
+            self.on_shortcuts_loaded(self.shortcuts)
+        
+    def on_shortcuts_loaded(self, shortcut_manager):
+        """Start using the shortcut database once it is loaded"""
+        self.shortcuts = shortcut_manager
+        if self.loading_item is not None:
+            self.tree.delete(self.loading_item)
+            self.loading_item = None
+        
+        # Reload shortcut files edited while we run
+        self.watcher = FileWatcher(create_watcher_backend(), self.shortcuts.watched_paths())
+        self.watcher.add_listener(self.on_files_changed)
+        self.watcher.start()
         
         # Get initial shortcuts
         self.update_shortcuts()
         
+    def on_load_failed(self, error):
+        """Replace the loading placeholder with the error"""
+        self.tree.item(self.loading_item, text=f"Could not load shortcuts: {error}")
+        
     def create_search_bar(self):
         # ... search bar implementation
         pass
 
     def create_shortcut_tree(self):
-        print("Creating shortcut tree...")
+        log.debug("Creating shortcut tree")
         
         # Create a frame for the tree
         frame = ttk.Frame(self.root)
@@ -67,33 +129,44 @@ class MainWindow:
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
-        print("Shortcut tree created")
+        log.debug("Shortcut tree created")
 
     def update_shortcuts(self):
         # Get active window process
-        process_name = self.get_active_window_process()
+        process_name = self.get_current_process()
         if process_name:
             self.display_shortcuts(process_name)
 
+    def get_current_process(self):
+        """Get the foreground process, from the detector when it knows it"""
+        if self.detector is not None:
+            process_name = self.detector.get_current_process()
+            if process_name:
+                return process_name
+        return self.get_active_window_process()
+
     def get_active_window_process(self):
         """Get the process name of the active window"""
         try:
+            import win32gui
+            import win32process
+            
             # Get handle of active window
             hwnd = win32gui.GetForegroundWindow()
             
             # Get process ID from window handle
             _, process_id = win32process.GetWindowThreadProcessId(hwnd)
             
-            # Get process name from process ID
-            process = psutil.Process(process_id)
-            print(f"Active process: {process.name()}")
-            return process.name()
+            # Get process name from process ID (cached, PID-reuse safe)
+            process_name = get_process_name(process_id)
+            log.debug("Active process: %s", process_name)
+            return process_name
         except Exception as e:
-            print(f"Error getting active window process: {e}")
+            log.warning("Error getting active window process: %s", e)
             return None
         
     def toggle_overlay(self):
-        print("Toggle overlay called")
+        log.debug("Toggle overlay called")
         """Toggle the visibility of the shortcut overlay"""
         if self.root.state() == 'normal':
             self.hide_overlay()
@@ -109,54 +182,122 @@ class MainWindow:
             
     def show_overlay(self):
         """Show the shortcut overlay"""
-        # Get active window process
-        process_name = self.get_active_window_process()
+        with latency.span("hotkey_to_visible"):
+            # Get active window process
+            with latency.span("get_active_window_process"):
+                process_name = self.get_current_process()
+            
+            # Update shortcuts display, unless it was pre-rendered while hidden
+            if process_name and self.shortcuts is None:
+                # Still loading: the placeholder shows until the lookup can be served
+                self.loader.when_ready(lambda manager: self.serve_lookup(process_name))
+            elif process_name and not self.is_rendered(process_name):
+                self.display_shortcuts(process_name)
+            
+            # Show the window
+            with latency.span("show_window"):
+                self.root.deiconify()
+                self.root.attributes('-alpha', 0.9)
+                self.root.lift()
         
-        # Update shortcuts display
-        if process_name:
+    def serve_lookup(self, process_name):
+        """Show an app queued while the shortcuts were loading"""
+        if not self.is_rendered(process_name):
             self.display_shortcuts(process_name)
         
-        # Show the window
-        self.root.deiconify()
-        self.root.attributes('-alpha', 0.9)
-        self.root.lift()
-        
     def hide_overlay(self):
         """Hide the overlay"""
         self.root.withdraw()
+        
+    def on_focus_change(self, process_name):
+        """Detector listener: schedule a pre-render of the newly focused app"""
+        self.focus_generation += 1
+        generation = self.focus_generation
+        self.root.after(PRERENDER_DELAY, lambda: self.prerender(process_name, generation))
+        
+    def prerender(self, process_name, generation):
+        """Build the overlay for an app while the window is hidden"""
+        # Focus moved on again before the delay ran out
+        if generation != self.focus_generation:
+            return
+        if self.root.state() == 'normal' or self.shortcuts is None:
+            return
+        self.display_shortcuts(process_name)
+        
+    def on_files_changed(self, paths):
+        """Watcher listener: reread the changed files, then swap them in on the Tk thread"""
+        reload = self.shortcuts.read_changes(paths)
+        if reload.changes or reload.shortcuts_db is not None:
+            self.dispatcher.post(self.apply_reload, reload)
+            
+    def apply_reload(self, reload):
+        """Swap in reloaded shortcuts and rebuild only the affected trees"""
+        changed = self.shortcuts.apply_reload(reload)
+        rendered_app = self.rendered[0] if self.rendered is not None else None
+        for app_name in changed:
+            # The shown app's items are replaced by display_shortcuts below
+            if app_name != rendered_app and app_name in self.tree_cache:
+                _, items = self.tree_cache.pop(app_name)
+                self.tree.delete(*items)
+        if rendered_app in changed:
+            self.display_shortcuts(rendered_app)
+        
+    def is_rendered(self, process_name):
+        """Check whether the tree already shows the current shortcuts of an app"""
+        return (self.rendered is not None and self.rendered[0] == process_name
+                and self.rendered[1] is self.shortcuts.get_grouped_shortcuts(process_name))
 
     def display_shortcuts(self, process_name):
         """Display shortcuts for the active application"""
-        print(f"Displaying shortcuts for: {process_name}")
+        log.debug("Displaying shortcuts for: %s", process_name)
         
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        categories = self.shortcuts.get_grouped_shortcuts(process_name)
         
-        shortcuts = self.shortcuts.get_shortcuts_for_app(process_name)
-        print(f"Found {len(shortcuts)} shortcuts for {process_name}")
+        # Reuse the items built the last time this app was shown, unless its
+        # shortcuts have changed since
+        cached = self.tree_cache.get(process_name)
+        if cached is not None and cached[0] is categories:
+            self.tree_cache.move_to_end(process_name)
+            items = cached[1]
+        else:
+            if cached is not None:
+                self.tree.delete(*cached[1])
+            with latency.span("tree_population"):
+                items = self.build_items(process_name, categories)
+            self.tree_cache[process_name] = (categories, items)
+            self.tree_cache.move_to_end(process_name)
+            
+            # Drop the least recently shown apps beyond the cache size
+            while len(self.tree_cache) > TREE_CACHE_SIZE:
+                _, (_, old_items) = self.tree_cache.popitem(last=False)
+                self.tree.delete(*old_items)
         
-        if not shortcuts:
-            self.tree.insert("", "end", text=f"No shortcuts for {process_name}", values=("", ""))
-            return
+        # Attach this app's items and detach all others in a single Tk call
+        self.tree.set_children("", *items)
+        self.rendered = (process_name, categories)
+        
+    def build_items(self, process_name, categories):
+        """Insert the tree items for an app and return the top-level item ids"""
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Found %d shortcuts for %s", sum(group.count for group in categories), process_name)
         
-        # Group shortcuts by category
-        categories = {}
-        for shortcut in shortcuts:
-            category = shortcut.get("category", "General")
-            if category not in categories:
-                categories[category] = []
-            categories[category].append(shortcut)
+        if not categories:
+            return (self.tree.insert("", "end", text=f"No shortcuts for {process_name}", values=("", "")),)
         
         # Add categories and shortcuts to the tree
-        for category, cat_shortcuts in categories.items():
-            print(f"Adding category: {category} with {len(cat_shortcuts)} shortcuts")
-            category_id = self.tree.insert("", "end", text=category, values=("", ""))
+        items = []
+        debug = log.isEnabledFor(logging.DEBUG)
+        for category in categories:
+            if debug:
+                log.debug("Adding category: %s with %d shortcuts", category.name, category.count)
+            category_id = self.tree.insert("", "end", text=category.name, values=("", ""))
+            items.append(category_id)
             
-            for shortcut in cat_shortcuts:
+            for shortcut in category.shortcuts:
                 self.tree.insert(
                     category_id, 
                     "end", 
                     text=shortcut["description"], 
                     values=(shortcut["keys"], shortcut.get("detail", ""))
-                )
\ No newline at end of file
+                )
+        return tuple(items)
@@ -0,0 +1,144 @@
+class VirtualRows:
+    """Windowed rendering of a long flat list in a ttk.Treeview.
+
+    Only the visible rows plus a margin above and below exist as tree
+    items. Scrolling rewrites those items with the rows coming into view,
+    and the scrollbar is driven from the position in the full list.
+    """
+
+    def __init__(self, tree, scrollbar, margin=20, row_height=25):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.margin = margin
+        self.row_height = row_height
+        self.rows = []   # (text, values) for every row in the list
+        self.items = []  # Pooled tree items, showing rows[start:start + len(items)]
+        self.start = 0
+        self.top = 0     # Index of the first visible row
+        self.active = False
+        self._recenter_pending = False
+
+    def visible_rows(self):
+        """Get the number of rows the tree can show at once"""
+        return max(int(self.tree.cget("height")), self.tree.winfo_height() // self.row_height)
+
+    def show(self, rows):
+        """Show rows, materializing only the visible window"""
+        self.clear()
+        self.rows = rows
+        self.active = True
+        self.start = 0
+        self.top = 0
+
+        # Route scrolling through the window instead of the tree
+        self.tree.configure(yscrollcommand=self.on_tree_scroll)
+        self.scrollbar.configure(command=self.yview)
+
+        pool_size = min(len(rows), self.visible_rows() + 2 * self.margin)
+        self.items = [self.tree.insert("", "end", text="", values=("", "")) for _ in range(pool_size)]
+        self.render()
+
+        if self.items:
+            self.focus_row(0)
+
+    def clear(self):
+        """Remove the pooled items and give scrolling back to the tree"""
+        if not self.active:
+            return
+
+        if self.items:
+            self.tree.delete(*self.items)
+        self.items = []
+        self.rows = []
+        self.active = False
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.configure(command=self.tree.yview)
+
+    def render(self):
+        """Write the rows of the current window into the pooled items"""
+        for offset, item in enumerate(self.items):
+            text, values = self.rows[self.start + offset]
+            self.tree.item(item, text=text, values=values)
+
+    def index_of(self, item):
+        """Get the row index shown by a pooled item, or None"""
+        if item in self.items:
+            return self.start + self.items.index(item)
+        return None
+
+    def focus_row(self, index):
+        """Focus and select a row that is inside the window"""
+        item = self.items[index - self.start]
+        self.tree.focus(item)
+        self.tree.selection_set(item)
+
+    def scroll_to(self, top):
+        """Scroll so that row top is the first visible row"""
+        total = len(self.rows)
+        top = max(0, min(top, total - self.visible_rows()))
+        start = max(0, min(top - self.margin, total - len(self.items)))
+
+        if start != self.start:
+            focused = self.index_of(self.tree.focus())
+            self.start = start
+            self.render()
+            # The pooled items now show other rows, so move the focus with its row
+            if focused is not None and start <= focused < start + len(self.items):
+                self.focus_row(focused)
+            else:
+                self.tree.selection_set(())
+
+        self.top = top
+        self.tree.yview_moveto((top - self.start) / len(self.items))
+
+    def move_focus(self, delta):
+        """Move the focus by delta rows, scrolling it into view"""
+        if not self.rows:
+            return
+
+        current = self.index_of(self.tree.focus())
+        target = self.top if current is None else max(0, min(current + delta, len(self.rows) - 1))
+
+        visible = self.visible_rows()
+        if target < self.top:
+            self.scroll_to(target)
+        elif target >= self.top + visible:
+            self.scroll_to(target - visible + 1)
+        self.focus_row(target)
+
+    def yview(self, *args):
+        """Scrollbar command, in terms of the full list"""
+        if not self.rows:
+            return
+
+        if args[0] == "moveto":
+            top = round(float(args[1]) * len(self.rows))
+        else:
+            step = self.visible_rows() if args[2] == "pages" else 1
+            top = self.top + int(args[1]) * step
+        self.scroll_to(top)
+
+    def on_tree_scroll(self, first, last):
+        """Tree yscrollcommand: map the window position onto the full list"""
+        if not self.items:
+            return
+
+        total = len(self.rows)
+        pool_size = len(self.items)
+        visible = self.visible_rows()
+        self.top = self.start + round(float(first) * pool_size)
+        self.scrollbar.set(self.top / total, min(1.0, (self.top + visible) / total))
+
+        # Native scrolling (mouse wheel) got close to the edge of the window
+        near_start = self.top - self.start < self.margin // 2 and self.start > 0
+        near_end = (self.start + pool_size - (self.top + visible) < self.margin // 2
+                    and self.start + pool_size < total)
+        if (near_start or near_end) and not self._recenter_pending:
+            self._recenter_pending = True
+            self.tree.after_idle(self._recenter)
+
+    def _recenter(self):
+        """Shift the window so the visible rows sit in its middle"""
+        self._recenter_pending = False
+        if self.active:
+            self.scroll_to(self.top)
@@ -1,16 +1,50 @@
 import os
 import json
+import threading
+import time
+from src.shortcuts.pack import open_pack, source_signature, write_pack
+from src.shortcuts.record import StringPool, db_to_records, to_dicts, to_records
+from src.utils.log import get_logger
+from src.utils.persistence import BackgroundWriter, append_durable, atomic_write
+
+log = get_logger(__name__)
+
+# The journal is folded into shortcuts.json once it outgrows both of these
+JOURNAL_COMPACT_MIN = 64 * 1024
+JOURNAL_COMPACT_RATIO = 0.25
+
+
+def apply_shortcut_changes(shortcuts, changes):
+    """Apply journaled per-app changes to a shortcut mapping in place"""
+    for app_name, items in changes.items():
+        if items is None:
+            shortcuts.pop(app_name, None)
+        else:
+            shortcuts[app_name] = items
+
 
 class ConfigManager:
-    def __init__(self):
-        self.config_dir = os.path.join(os.path.expanduser("~"), ".shortcut_helper")
+    def __init__(self, config_dir=None):
+        if config_dir is None:
+            config_dir = os.path.join(os.path.expanduser("~"), ".shortcut_helper")
+        self.config_dir = config_dir
         self.config_file = os.path.join(self.config_dir, "config.json")
         self.shortcuts_file = os.path.join(self.config_dir, "shortcuts.json")
+        self.shortcuts_pack = os.path.join(self.config_dir, "shortcuts.pack")
+        self.shortcuts_journal = os.path.join(self.config_dir, "shortcuts.journal")
+        self.packs_dir = os.path.join(self.config_dir, "packs")
         
         # Create config directory if it doesn't exist
         if not os.path.exists(self.config_dir):
             os.makedirs(self.config_dir)
             
+        # Saves are written on a background thread, coalesced and atomically
+        self.writer = BackgroundWriter()
+        self.shortcuts_lock = threading.Lock()
+        self.pending_shortcuts = None  # Full database waiting to be written
+        self.pending_changes = {}  # app -> shortcuts, or None if removed
+        self.own_writes = {}  # path -> (mtime, size) after our last write, None once removed
+            
         # Load or create configuration
         self.config = self.load_config()
         
@@ -36,7 +70,15 @@ class ConfigManager:
             "window_width": 600,
             "window_height": 500,
             "show_window_frame": True,
-            "opacity": 0.95
+            "opacity": 0.95,
+            "lazy_loading": False,
+            "lazy_cache_size": 8,
+            # Apps whose grouped view and search index are kept, outside lazy mode
+            "view_cache_size": 32,
+            "columnar_storage": False,
+            "instrumentation": False,
+            # "auto", "serial", "thread" or "process"
+            "pack_executor": "auto"
         }
         
     def save_config(self, config=None):
@@ -44,24 +86,226 @@ class ConfigManager:
         if config is None:
             config = self.config
             
-        with open(self.config_file, 'w') as f:
-            json.dump(config, f, indent=2)
+        snapshot = dict(config)
+        self.writer.schedule(self.config_file, lambda: json.dumps(snapshot, indent=2).encode('utf-8'),
+                             after_write=lambda data: self.remember_write(self.config_file))
             
-    def get_shortcuts(self):
-        """Load shortcuts from file"""
-        if os.path.exists(self.shortcuts_file):
-            try:
-                with open(self.shortcuts_file, 'r') as f:
-                    return json.load(f)
-            except Exception:
-                return None
-        else:
+    def get_shortcuts(self, quarantine=True):
+        """Load shortcuts from file, with the journaled changes applied"""
+        # Make sure a pending save isn't read back as the old contents
+        self.writer.flush()
+        shortcuts = self.read_shortcuts_file(quarantine)
+        if shortcuts is None:
             return None
             
+        changes = self.get_shortcut_changes()
+        apply_shortcut_changes(shortcuts, changes)
+        if changes and self.journal_needs_compaction():
+            self.save_shortcuts(shortcuts)
+        return shortcuts
+            
+    def read_shortcuts_file(self, quarantine=True):
+        """Load shortcuts.json alone, from the compiled pack when it is current.
+
+        Every app is decoded, which costs about as much as parsing the
+        JSON; only lazy_loading, reading single apps from the pack, makes
+        startup faster.
+
+        With quarantine=False an unparsable file is left in place, for
+        rereads of a file that may be half-written by an editor.
+        """
+        if not os.path.exists(self.shortcuts_file):
+            return None
+            
+        # Use the compiled pack while it matches the JSON file
+        pack = open_pack(self.shortcuts_pack, self.shortcuts_file)
+        if pack is not None:
+            with pack:
+                return pack.to_dict()
+                
+        try:
+            with open(self.shortcuts_file, 'rb') as f:
+                # Stat before reading: an edit made while we read changes the
+                # mtime after this, so the pack can't claim the new version
+                stat = os.fstat(f.fileno())
+                data = f.read()
+            shortcuts = db_to_records(json.loads(data))
+        except OSError as e:
+            log.error("Could not read %s: %s", self.shortcuts_file, e)
+            return None
+        except (ValueError, TypeError, AttributeError) as e:
+            if quarantine:
+                self.quarantine(self.shortcuts_file, e)
+            else:
+                log.warning("Could not parse %s: %s", self.shortcuts_file, e)
+            return None
+            
+        self.compile_shortcuts(shortcuts, stat, source_signature(data))
+        return shortcuts
+            
+    def get_shortcut_pack(self, quarantine=True):
+        """Open the compiled shortcut pack, compiling it first if needed.
+
+        The pack only covers shortcuts.json; apply get_shortcut_changes()
+        on top of it.
+        """
+        self.writer.flush()
+        if not os.path.exists(self.shortcuts_file):
+            return None
+            
+        pack = open_pack(self.shortcuts_pack, self.shortcuts_file)
+        if pack is None and self.read_shortcuts_file(quarantine) is not None:
+            pack = open_pack(self.shortcuts_pack, self.shortcuts_file)
+        return pack
+            
+    def get_shortcut_changes(self):
+        """Read the per-app changes journaled since shortcuts.json was written.
+
+        Returns {app: shortcuts}, with None for apps that were removed.
+        """
+        changes = {}
+        pool = StringPool()
+        try:
+            with open(self.shortcuts_journal, 'rb') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        items = entry["shortcuts"]
+                        changes[entry["app"]] = None if items is None else to_records(items, pool)
+                    except (ValueError, KeyError, TypeError, AttributeError):
+                        # A crash mid-append leaves a torn last line
+                        log.warning("Skipping unreadable entry in %s", self.shortcuts_journal)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            log.error("Could not read %s: %s", self.shortcuts_journal, e)
+        return changes
+            
+    def journal_needs_compaction(self):
+        """Check whether the journal has grown enough to fold into shortcuts.json"""
+        try:
+            journal_size = os.path.getsize(self.shortcuts_journal)
+        except OSError:
+            return False
+        try:
+            base_size = os.path.getsize(self.shortcuts_file)
+        except OSError:
+            base_size = 0
+        return journal_size > max(JOURNAL_COMPACT_MIN, base_size * JOURNAL_COMPACT_RATIO)
+            
     def save_shortcuts(self, shortcuts):
-        """Save shortcuts to file"""
-        with open(self.shortcuts_file, 'w') as f:
-            json.dump(shortcuts, f, indent=2)
+        """Save the whole shortcut database in the background"""
+        # Copy the per-app lists so later edits don't race the writer thread
+        snapshot = {app: list(items) for app, items in shortcuts.items()}
+        with self.shortcuts_lock:
+            self.pending_shortcuts = snapshot
+            # The snapshot already includes any unwritten per-app changes
+            self.pending_changes = {}
+        self._schedule_shortcut_writes()
+            
+    def save_app_shortcuts(self, app_name, shortcuts):
+        """Save one application's shortcuts in the background.
+
+        Only the change is appended to the journal. Pass None to record
+        that the app was removed.
+        """
+        with self.shortcuts_lock:
+            self.pending_changes[app_name] = None if shortcuts is None else list(shortcuts)
+        self._schedule_shortcut_writes()
+            
+    def _schedule_shortcut_writes(self):
+        # Full saves and journal appends share one writer job so they land in order
+        self.writer.schedule(self.shortcuts_file, self._take_shortcut_writes,
+                             write=self._write_shortcuts)
+            
+    def _take_shortcut_writes(self):
+        with self.shortcuts_lock:
+            writes = (self.pending_shortcuts, self.pending_changes)
+            self.pending_shortcuts = None
+            self.pending_changes = {}
+        return writes
+            
+    def _write_shortcuts(self, path, writes):
+        """Write pending shortcut saves, on the writer thread"""
+        shortcuts, changes = writes
+        if shortcuts is not None:
+            self._write_shortcuts_file(shortcuts)
+            
+        if changes:
+            lines = "".join(
+                json.dumps({"app": app, "shortcuts": None if items is None else to_dicts(items)}) + "\n"
+                for app, items in changes.items())
+            append_durable(self.shortcuts_journal, lines.encode('utf-8'))
+            self.remember_write(self.shortcuts_journal)
+            
+            if self.journal_needs_compaction():
+                # A file that doesn't parse right now may be mid-edit; leave it
+                # in place and compact on a later write
+                shortcuts = self.read_shortcuts_file(quarantine=False)
+                if shortcuts is not None:
+                    apply_shortcut_changes(shortcuts, self.get_shortcut_changes())
+                    self._write_shortcuts_file(shortcuts)
+            
+    def _write_shortcuts_file(self, shortcuts):
+        """Rewrite shortcuts.json and drop the journal it now includes"""
+        data = json.dumps({app: to_dicts(items) for app, items in shortcuts.items()}, indent=2).encode('utf-8')
+        stat = atomic_write(self.shortcuts_file, data)
+        self.remember_write(self.shortcuts_file)
+        # Replaying the journal is idempotent, so a crash before this is harmless
+        if os.path.exists(self.shortcuts_journal):
+            os.remove(self.shortcuts_journal)
+        self.remember_write(self.shortcuts_journal)
+        self.compile_shortcuts(shortcuts, stat, source_signature(data))
+            
+    def remember_write(self, path):
+        """Record the state we left a file in, so watchers can skip our own writes"""
+        try:
+            st = os.stat(path)
+            self.own_writes[path] = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            self.own_writes[path] = None
+            
+    def is_own_write(self, path):
+        """Check whether a file is still exactly as we last wrote it"""
+        if path not in self.own_writes:
+            return False
+        try:
+            st = os.stat(path)
+            return self.own_writes[path] == (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            return self.own_writes[path] is None
+            
+    def quarantine(self, path, error):
+        """Move an unreadable file aside so it isn't overwritten with defaults"""
+        corrupt_path = f"{path}.corrupt-{time.strftime('%Y%m%d-%H%M%S')}"
+        try:
+            os.replace(path, corrupt_path)
+            log.error("%s is corrupt (%s), moved it to %s", path, error, corrupt_path)
+        except OSError as e:
+            log.error("%s is corrupt (%s) and could not be moved aside: %s", path, error, e)
+            
+    def flush(self):
+        """Write pending saves now"""
+        self.writer.flush()
+            
+    def close(self):
+        """Write pending saves and stop the background writer"""
+        self.writer.close()
+            
+    def compile_shortcuts(self, shortcuts, source_stat, source_hash):
+        """Rebuild the compiled shortcut pack, keeping the JSON file as fallback"""
+        try:
+            write_pack(shortcuts, self.shortcuts_pack, source_stat, source_hash)
+        except (OSError, ValueError) as e:
+            log.warning("Could not compile shortcut pack: %s", e)
+            
+    def get_pack_dirs(self):
+        """Get the user shortcut pack directories, in load order after the bundled packs"""
+        return [self.packs_dir, *self.config.get("pack_dirs", [])]
+            
+    def get(self, key, default=None):
+        """Get a configuration value"""
+        return self.config.get(key, default)
             
     def get_theme(self):
         """Get current theme"""
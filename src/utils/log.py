@@ -0,0 +1,48 @@
+import logging
+import os
+import sys
+
+# Root of the application's logger hierarchy
+LOGGER_NAME = "shortcut_helper"
+DEFAULT_LEVEL = "WARNING"
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+def get_logger(name):
+    """Get a logger under the application's hierarchy.
+
+    Pass arguments instead of pre-formatted strings so messages are only
+    formatted when the level is enabled, and guard loops that only exist
+    to log with log.isEnabledFor(logging.DEBUG).
+    """
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+def configure_logging(level=None, log_file=None):
+    """Set up the application's log output.
+
+    The level comes from the argument, then SHORTCUT_HELPER_LOG, then
+    WARNING. Output goes to stderr, or to log_file when given. Under
+    pythonw there is no stderr, so it goes to shortcut_helper.log in the
+    config directory instead.
+    """
+    level = level or os.environ.get("SHORTCUT_HELPER_LOG") or DEFAULT_LEVEL
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+
+    if log_file is None and sys.stderr is None:
+        log_dir = os.path.join(os.path.expanduser("~"), ".shortcut_helper")
+        os.makedirs(log_dir, exist_ok=True)
+        log_file = os.path.join(log_dir, "shortcut_helper.log")
+
+    if log_file is not None:
+        handler = logging.FileHandler(log_file, encoding="utf-8")
+    else:
+        handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    logger.addHandler(handler)
+    logger.propagate = False
+    return logger
@@ -0,0 +1,127 @@
+import contextlib
+import json
+import os
+import platform
+import threading
+import time
+from collections import deque
+
+# Stages timed between the hotkey callback and the window being visible
+STAGES = [
+    "dispatch",
+    "hotkey_to_visible",
+    "get_active_window_process",
+    "get_shortcuts_for_app",
+    "grouping",
+    "tree_population",
+    "show_window",
+]
+
+_NO_SPAN = contextlib.nullcontext()
+
+
+class _Span:
+    """Times one stage with the monotonic clock"""
+    __slots__ = ("recorder", "stage", "start")
+
+    def __init__(self, recorder, stage):
+        self.recorder = recorder
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.recorder.record(self.stage, (time.perf_counter() - self.start) * 1000)
+
+
+class LatencyRecorder:
+    """Opt-in per-stage latency recorder.
+
+    Keeps the last window samples of each stage in memory and reports
+    p50/p95/p99 over them. When disabled, span() hands back a shared
+    no-op context manager.
+    """
+
+    def __init__(self, enabled=False, window=1000):
+        self.enabled = enabled
+        self.window = window
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def span(self, stage):
+        """Context manager timing one run of a stage"""
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, stage)
+
+    def record(self, stage, elapsed_ms):
+        """Add a sample for a stage"""
+        with self.lock:
+            samples = self.samples.get(stage)
+            if samples is None:
+                samples = self.samples[stage] = deque(maxlen=self.window)
+            samples.append(elapsed_ms)
+
+    def summary(self):
+        """Get count, p50, p95, p99 and max in ms for each stage"""
+        with self.lock:
+            snapshot = {stage: sorted(samples) for stage, samples in self.samples.items()}
+
+        def percentile(values, fraction):
+            return values[min(len(values) - 1, int(len(values) * fraction))]
+
+        ordered = [s for s in STAGES if s in snapshot] + [s for s in snapshot if s not in STAGES]
+        return {
+            stage: {
+                "count": len(snapshot[stage]),
+                "p50": percentile(snapshot[stage], 0.50),
+                "p95": percentile(snapshot[stage], 0.95),
+                "p99": percentile(snapshot[stage], 0.99),
+                "max": snapshot[stage][-1],
+            }
+            for stage in ordered if snapshot[stage]
+        }
+
+    def format_summary(self):
+        """Format the summary as a text table"""
+        if not self.enabled:
+            return "Latency instrumentation is off.\nSet SHORTCUT_HELPER_TIMINGS=1 to enable it."
+
+        summary = self.summary()
+        if not summary:
+            return "No samples yet. Press the hotkey to collect some."
+
+        lines = [f"{'stage':<26} {'n':>5} {'p50':>8} {'p95':>8} {'p99':>8}"]
+        for stage, stats in summary.items():
+            lines.append(f"{stage:<26} {stats['count']:>5} {stats['p50']:>8.2f} "
+                         f"{stats['p95']:>8.2f} {stats['p99']:>8.2f}")
+        lines.append("(milliseconds)")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        """Write the summary and raw samples to a JSON file"""
+        with self.lock:
+            samples = {stage: list(values) for stage, values in self.samples.items()}
+
+        report = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "summary": self.summary(),
+            "samples": samples,
+        }
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        return path
+
+    def reset(self):
+        """Drop all samples"""
+        with self.lock:
+            self.samples.clear()
+
+
+# Shared recorder, enabled with SHORTCUT_HELPER_TIMINGS=1 or the
+# "instrumentation" config setting
+latency = LatencyRecorder(enabled=bool(os.environ.get("SHORTCUT_HELPER_TIMINGS")))
@@ -0,0 +1,136 @@
+import os
+import tempfile
+import threading
+import time
+
+from src.utils.log import get_logger
+
+log = get_logger(__name__)
+
+
+def atomic_write(path, data):
+    """Write bytes to path so that readers see either the old or the new file.
+
+    The data goes to a temporary file in the same directory, is fsynced,
+    and then renamed over the target. Returns the stat of the written
+    file, taken before the rename so it can't describe someone else's.
+    """
+    # Each writer gets its own temporary file, so concurrent writes can't interleave
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                    prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+            stat = os.fstat(f.fileno())
+
+        # Windows refuses the rename while another process has the file open
+        for attempt in range(5):
+            try:
+                os.replace(tmp_path, path)
+                break
+            except PermissionError:
+                if attempt == 4:
+                    raise
+                time.sleep(0.05)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    # Make the rename itself durable where directories can be fsynced
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    return stat
+
+
+def append_durable(path, data):
+    """Append bytes to path and fsync them"""
+    with open(path, "ab") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class BackgroundWriter:
+    """Write-behind queue for files that change in bursts.
+
+    schedule() only records the latest serializer for a path and returns.
+    A daemon thread waits until no new writes have been scheduled for
+    delay seconds (but never longer than max_delay after the first one),
+    then serializes and atomically writes each pending file once.
+    """
+
+    def __init__(self, delay=0.5, max_delay=5.0):
+        self.delay = delay
+        self.max_delay = max_delay
+        self.pending = {}  # path -> (serialize, write, after_write)
+        self.first_scheduled = None
+        self.last_scheduled = None
+        self.condition = threading.Condition()
+        self.write_lock = threading.Lock()  # Serializes worker and flush() writes
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, name="BackgroundWriter", daemon=True)
+        self.thread.start()
+
+    def schedule(self, path, serialize, after_write=None, write=atomic_write):
+        """Queue a write of serialize() to path, replacing any pending write to it.
+
+        The data is stored with write(path, data), and after_write(data) is
+        called on the writer thread once it is on disk.
+        """
+        with self.condition:
+            now = time.monotonic()
+            if not self.pending:
+                self.first_scheduled = now
+            self.last_scheduled = now
+            self.pending[path] = (serialize, write, after_write)
+            self.condition.notify()
+
+    def _wait_for_quiet(self):
+        """Wait until there are pending writes and no new ones for a while"""
+        with self.condition:
+            while not self.pending and not self.stopped:
+                self.condition.wait()
+
+            while self.pending and not self.stopped:
+                deadline = min(self.last_scheduled + self.delay, self.first_scheduled + self.max_delay)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+
+    def _run(self):
+        while not self.stopped:
+            self._wait_for_quiet()
+            self.flush()
+
+    def flush(self):
+        """Write everything pending now, on the calling thread"""
+        # Taking and writing a batch under one lock keeps an older batch
+        # from landing after a newer one
+        with self.write_lock:
+            with self.condition:
+                batch = self.pending
+                self.pending = {}
+
+            for path, (serialize, write, after_write) in batch.items():
+                try:
+                    data = serialize()
+                    write(path, data)
+                    if after_write is not None:
+                        after_write(data)
+                except Exception:
+                    log.exception("Could not write %s", path)
+
+    def close(self):
+        """Flush pending writes and stop the writer thread"""
+        self.flush()
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        self.thread.join(timeout=5)
@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class ProcessNameCache:
+    """Bounded cache of process names.
+
+    Entries are keyed by pid plus process create time, so a pid reused by
+    a new process misses instead of returning the old name. Processes we
+    are not allowed to inspect are remembered for denied_ttl seconds so
+    they don't hit psutil on every call.
+    """
+
+    def __init__(self, max_size=256, denied_ttl=30.0):
+        self.max_size = max_size
+        self.denied_ttl = denied_ttl
+        self.names = OrderedDict()  # (pid, create time) -> name, least recently used first
+        self.denied = OrderedDict()  # pid -> expiry time
+        self.hits = 0
+        self.misses = 0
+        self.denied_hits = 0
+        self.lock = threading.Lock()
+
+    def get_name(self, pid):
+        """Get the name of a process, or None if it is gone or inaccessible"""
+        with self.lock:
+            expiry = self.denied.get(pid)
+            if expiry is not None:
+                if expiry > time.monotonic():
+                    self.denied_hits += 1
+                    return None
+                del self.denied[pid]
+
+        # psutil takes a while to import, so it waits until the first lookup
+        import psutil
+        
+        try:
+            process = psutil.Process(pid)
+            key = (pid, process.create_time())
+        except psutil.AccessDenied:
+            self._deny(pid)
+            return None
+        except psutil.Error:
+            return None
+
+        with self.lock:
+            name = self.names.get(key)
+            if name is not None:
+                self.names.move_to_end(key)
+                self.hits += 1
+                return name
+            self.misses += 1
+
+        try:
+            name = process.name()
+        except psutil.AccessDenied:
+            self._deny(pid)
+            return None
+        except psutil.Error:
+            return None
+
+        with self.lock:
+            self.names[key] = name
+            while len(self.names) > self.max_size:
+                self.names.popitem(last=False)
+        return name
+
+    def _deny(self, pid):
+        """Remember that a process can't be inspected"""
+        with self.lock:
+            self.denied[pid] = time.monotonic() + self.denied_ttl
+            self.denied.move_to_end(pid)
+            while len(self.denied) > self.max_size:
+                self.denied.popitem(last=False)
+
+    def stats(self):
+        """Get the cache counters"""
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "denied_hits": self.denied_hits,
+                "size": len(self.names),
+                "denied": len(self.denied),
+            }
+
+    def clear(self):
+        """Forget all cached names"""
+        with self.lock:
+            self.names.clear()
+            self.denied.clear()
+
+
+# Shared cache used by the foreground lookups
+process_names = ProcessNameCache()
+
+
+def get_process_name(pid):
+    """Get the name of a process through the shared cache"""
+    return process_names.get_name(pid)